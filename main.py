@@ -6,6 +6,7 @@ import os
 import sys
 import time
 import threading
+import multiprocessing
 import tkinter as tk
 from pynput.mouse import Listener, Button
 
@@ -22,11 +23,13 @@ try:
         apply_global_dark_theme
     )
     
-    # Inicializar ttkbootstrap
-    init_ttkbootstrap("darkly")  # Usa el tema oscuro por defecto
-    
-    # Aplicar tema oscuro global
-    apply_global_dark_theme()
+    # Los workers OCR (multiprocessing spawn) reimportan este módulo: sólo el proceso principal inicializa la UI
+    if multiprocessing.parent_process() is None:
+        # Inicializar ttkbootstrap
+        init_ttkbootstrap("darkly")  # Usa el tema oscuro por defecto
+        
+        # Aplicar tema oscuro global
+        apply_global_dark_theme()
     
     # Mostrar información de estado
     if USING_TTKBOOTSTRAP:
@@ -54,8 +57,19 @@ except ImportError:
 from src.utils.logger import setup_logger, log_message
 from src.config.settings import load_config, save_config
 from src.ui.main_window import create_main_window, root, running, auto_running, update_ui_status
-from src.core.ocr_engine import initialize_ocr
-from src.core.poker_analyzer import analyze_table, clear_nick_cache
+from src.core.ocr_engine import initialize_ocr, shutdown_ocr
+from src.core.capture import load_capture_settings, shutdown_capture
+from src.core.nick_cache import load_nick_cache_settings
+from src.core.api_client import configure_http_session
+from src.core.stats_cache import load_stats_cache_settings, save_stats_cache
+from src.core.nick_candidates import load_candidate_settings
+from src.core.gpt_client import configure_openai
+from src.core.analysis_cache import load_analysis_cache_settings, save_analysis_cache
+from src.core.history_manager import load_history_settings, close_history
+from src.utils.tracing import load_tracing_settings
+from src.utils.metrics import start_metrics_server, stop_metrics_server
+from src.utils.capture_archiver import load_archiver_settings, shutdown_archiver
+from src.core.poker_analyzer import analyze_table, analyze_tables_batch, clear_nick_cache, shutdown_analysis_executor, load_sweep_settings
 from src.utils.windows import get_window_under_cursor, find_poker_tables, focus_window
 
 # Variables globales
@@ -116,13 +130,9 @@ def auto_mode_loop(config):
         try:
             tables = find_poker_tables()
             if tables:
-                for hwnd, title in tables:
-                    if not auto_running or not running:
-                        break
-                    
-                    log_message(f"Procesando mesa automáticamente: {title}")
-                    analyze_table(hwnd, config)
-                    time.sleep(1)  # Pausa entre mesas
+                # Barrido por lotes: capturar todas las mesas, un OCR y consultas en paralelo
+                log_message(f"Procesando {len(tables)} mesas automáticamente")
+                analyze_tables_batch(tables, config, lambda: auto_running and running)
             
             # Esperar antes de siguiente ciclo
             for _ in range(config["auto_check_interval"]):
@@ -206,6 +216,28 @@ def on_exit():
     # Detener listener de clic derecho
     stop_right_click_listener()
     
+    # Detener workers OCR
+    shutdown_ocr()
+    
+    # Escribir las capturas de depuración pendientes
+    shutdown_archiver()
+    
+    # Liberar DCs y búferes de captura de las mesas
+    shutdown_capture()
+    
+    # Cancelar análisis GPT pendientes
+    shutdown_analysis_executor()
+    
+    # Guardar cachés de stats y análisis para la próxima sesión
+    save_stats_cache()
+    save_analysis_cache()
+    
+    # Cerrar la base de datos del historial
+    close_history()
+    
+    # Detener el endpoint de métricas
+    stop_metrics_server()
+    
     # Guardar configuración y datos finales
     try:
         config = load_config()
@@ -262,6 +294,20 @@ def main():
         # Cargar configuración
         config = load_config()
         
+        # Seleccionar backend de captura
+        load_capture_settings(config)
+        load_nick_cache_settings(config)
+        configure_http_session(config)
+        load_stats_cache_settings(config)
+        load_candidate_settings(config)
+        configure_openai(config)
+        load_analysis_cache_settings(config)
+        load_history_settings(config)
+        load_tracing_settings(config)
+        load_archiver_settings(config)
+        load_sweep_settings(config)
+        start_metrics_server(config)
+        
         # Inicializar OCR
         if not initialize_ocr(config):
             log_message("Error al inicializar OCR. Las funciones de lectura pueden fallar.", level='warning')
@@ -304,4 +350,5 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -12,6 +12,18 @@ DEFAULT_CONFIG = {
     "openai_api_key": "",  # será reemplazado desde .env
     "ocr_coords": {"x": 95, "y": 110, "w": 95, "h": 22},
     "server_url": "http://localhost:3000",
+    "http_pool_size": 10,  # conexiones keep-alive por host hacia server_url
+    "http_reintentos": 2,
+    "http_backoff": 0.3,
+    "http_timeout": 10,
+    "api_agrupar_ms": 20,  # ventana para agrupar consultas en una llamada bulk (0 = desactivado)
+    "api_lote_max": 50,
+    "nick_variantes_max": 8,  # variantes del nick leído (fragmentos, confusiones OCR) a consultar
+    "nick_busqueda_timeout": 8,  # segundos máximos buscando variantes
+    "stats_cache_ttl": 300,  # segundos que los stats se consideran frescos
+    "stats_cache_stale": 3600,  # segundos extra sirviendo stats caducados mientras se refrescan
+    "stats_cache_negativo_ttl": 60,  # segundos que se recuerda un jugador no encontrado
+    "stats_cache_persistente": False,  # guardar la caché en config/stats_cache.json al salir
     "sala_default": "XPK",
     "hotkey": "alt+q",
     "modo_automatico": False,
@@ -21,6 +33,51 @@ DEFAULT_CONFIG = {
     "tema": "dark",
     "idioma_ocr": "ch",
     "mostrar_dialogo_copia": False,
+    "captura_backend": "gdi",  # gdi, mss, dxgi o replay (PNGs de captura_replay_dir)
+    "captura_replay_dir": "capturas",
+    "ocr_gpu": True,
+    "ocr_workers": 2,  # 0 = motor OCR local en el proceso principal
+    "ocr_cola_max": 16,
+    "ocr_timeout": 10,
+    "ocr_cola_timeout": 2,
+    "ocr_timeout_inicio": 120,
+    "ocr_lote_max": 8,  # capturas por llamada OCR en el barrido automático
+    "ocr_rec_batch": 8,
+    "ocr_modo_rapido": True,  # sólo reconocimiento; pipeline completo si la confianza es baja
+    "ocr_umbral_confianza": 0.85,
+    "tesseract_idiomas": "chi_sim+jpn+kor+eng",  # respaldo cuando PaddleOCR no lee nada
+    "tesseract_tessdata": "",  # carpeta tessdata; vacío = la de la instalación
+    "tesseract_cache_max": 256,  # lecturas de Tesseract recordadas por imagen
+    "auto_max_paralelo": 8,
+    "asientos_mesa": 6,  # jugadores por mesa para la lectura de mesa completa
+    "asientos_layouts": {},  # sala -> {"6": [{"x", "y", "w", "h"} por asiento], "9": [...]}
+    "asientos_pegar_analisis": False,  # pegar también los análisis ya disponibles de cada asiento
+    "auto_detectar_cambios": True,  # omitir en el barrido las mesas cuyo nick no cambió
+    "auto_umbral_cambio": 8,  # bits de diferencia del hash por debajo de los que la mesa no cambió
+    "gpt_max_concurrentes": 2,  # análisis GPT simultáneos en segundo plano
+    "openai_base_url": "",  # vacío = API oficial; p. ej. http://127.0.0.1:8080/v1 para un servidor local
+    "openai_timeout": 30,
+    "openai_max_conexiones": 10,
+    "analisis_cache_max": 1000,
+    "analisis_cache_tolerancia": 3,  # ancho en puntos de los tramos de stats que comparten análisis
+    "analisis_cache_entre_jugadores": False,  # reutilizar análisis de otros jugadores con el mismo perfil
+    "analisis_cache_persistente": False,  # guardar la caché en config/analysis_cache.json al salir
+    "historial_retencion_dias": 0,  # 0 = conservar el historial sin límite de tiempo
+    "historial_max_entradas": 0,  # 0 = sin límite de entradas
+    "historial_filas": 20,  # filas iniciales de la tabla de historial (sólo se crean las visibles)
+    "historial_flush_ms": 1000,  # espera para agrupar cambios del historial antes de escribirlos
+    "trazas_activas": True,  # medir la duración de cada etapa del análisis
+    "trazas_muestras": 500,  # análisis recientes usados para los percentiles p50/p95/p99
+    "trazas_archivo": False,  # añadir cada traza a logs/trazas_<fecha>.jsonl
+    "capturas_guardar": True,  # archivar recortes del nick para depuración y como corpus de pruebas
+    "capturas_dir": "capturas/archivo",  # separado de captura_replay_dir para no mezclarse con el corpus
+    "capturas_muestreo": 0.1,  # fracción de capturas archivadas (1 = todas)
+    "capturas_max_mb": 100,  # cuota en disco; se borran primero las más antiguas
+    "capturas_max_archivos": 2000,
+    "capturas_guardar_ocr": True,  # JSON junto a cada captura con el nick leído
+    "metricas_puerto": 9464,  # endpoint Prometheus en http://127.0.0.1:<puerto>/metrics (0 = desactivado)
+    "nick_cache_max": 512,
+    "nick_cache_tolerancia": 4,  # bits de diferencia entre hashes del mismo nick (nicks distintos difieren en 13 o más)
     "stats_seleccionadas": {
         "vpip": True, "pfr": True, "three_bet": True, "fold_to_3bet_pct": True,
         "wtsd": True, "wsd": True, "cbet_flop": True, "cbet_turn": True,
@@ -83,6 +140,7 @@ def load_config():
         # ⚠️ Cargar valores sensibles desde .env
         config["token"] = os.getenv("TOKEN", "")
         config["openai_api_key"] = os.getenv("OPENAI_API_KEY", "")
+        config["openai_base_url"] = os.getenv("OPENAI_BASE_URL", config.get("openai_base_url", ""))
 
         return config
 
@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from src.utils.logger import log_message
+
+ANALYSIS_CACHE_PATH = Path("config/analysis_cache.json")
+
+# Stats que definen el perfil de un jugador para reutilizar análisis
+PROFILE_STATS = [
+    "vpip", "pfr", "three_bet", "fold_to_3bet_pct", "cbet_flop", "cbet_turn",
+    "wwsf", "wtsd", "wsd", "fold_to_flop_cbet_pct", "fold_to_turn_cbet_pct"
+]
+
+# Límites de manos: el análisis cambia si el sample es bajo (< 1000 manos)
+SAMPLE_BANDS = [100, 500, 1000, 5000, 20000]
+
+# Caché global perfil cuantizado -> {"analysis", "nick", "timestamp"} (orden LRU)
+analysis_entries = OrderedDict()
+cache_lock = threading.Lock()
+cache_settings = {
+    "max_size": 1000,
+    "tolerance": 3.0,  # ancho de cada tramo en puntos porcentuales
+    "cross_player": False,  # reutilizar análisis de otros jugadores con el mismo perfil
+    "persistent": False
+}
+cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def load_analysis_cache_settings(config):
+    """Actualiza tamaño, tolerancia y persistencia de la caché de análisis desde la configuración"""
+    cache_settings["max_size"] = max(1, int(config.get("analisis_cache_max", 1000)))
+    cache_settings["tolerance"] = max(0.1, float(config.get("analisis_cache_tolerancia", 3)))
+    cache_settings["cross_player"] = bool(config.get("analisis_cache_entre_jugadores", False))
+    cache_settings["persistent"] = bool(config.get("analisis_cache_persistente", False))
+
+    if cache_settings["persistent"]:
+        load_analysis_cache()
+
+def _sample_band(total_manos):
+    """Devuelve el índice del tramo de manos del jugador"""
+    for index, limit in enumerate(SAMPLE_BANDS):
+        if total_manos < limit:
+            return index
+    return len(SAMPLE_BANDS)
+
+def stats_profile(stats_data):
+    """Cuantiza los stats en tramos de ancho 'tolerance' junto con el tramo de manos; None si falta alguno"""
+    tolerance = cache_settings["tolerance"]
+    buckets = []
+    try:
+        for stat in PROFILE_STATS:
+            buckets.append(int(float(stats_data[stat]) // tolerance))
+        band = _sample_band(float(stats_data["total_manos"]))
+    except (KeyError, ValueError, TypeError):
+        # Un perfil incompleto coincidiría con jugadores sin relación: no se cachea
+        return None
+
+    return tuple(buckets) + (band,)
+
+def _cache_key(nick, sala, profile):
+    """Clave de la caché: sin nick si se comparten análisis entre jugadores"""
+    if cache_settings["cross_player"]:
+        return (sala, profile)
+    return (sala, nick, profile)
+
+def lookup_analysis(nick, sala, stats_data):
+    """Busca un análisis generado para un perfil equivalente y lo adapta al nick pedido"""
+    profile = stats_profile(stats_data)
+    key = _cache_key(nick, sala, profile) if profile is not None else None
+
+    with cache_lock:
+        entry = analysis_entries.get(key) if key is not None else None
+        if entry is None:
+            cache_stats["misses"] += 1
+            return None
+        analysis_entries.move_to_end(key)
+        cache_stats["hits"] += 1
+
+    analysis = entry["analysis"]
+    if entry["nick"] != nick:
+        # Sustituir sólo el nick completo, no fragmentos de otras palabras
+        pattern = r"(?<!\w)" + re.escape(entry["nick"]) + r"(?!\w)"
+        analysis = re.sub(pattern, lambda _: nick, analysis)
+    return analysis
+
+def store_analysis(nick, sala, stats_data, analysis):
+    """Guarda un análisis para el perfil del jugador, expulsando el menos usado si la caché está llena"""
+    # Los errores de GPT no se reutilizan
+    if not analysis or analysis.startswith("⚠️"):
+        return False
+
+    profile = stats_profile(stats_data)
+    if profile is None:
+        return False
+    key = _cache_key(nick, sala, profile)
+
+    with cache_lock:
+        analysis_entries[key] = {"analysis": analysis, "nick": nick, "timestamp": time.time()}
+        analysis_entries.move_to_end(key)
+        while len(analysis_entries) > cache_settings["max_size"]:
+            analysis_entries.popitem(last=False)
+            cache_stats["evictions"] += 1
+    return True
+
+def clear_analysis_cache():
+    """Vacía la caché de análisis y reinicia los contadores"""
+    with cache_lock:
+        analysis_entries.clear()
+        for counter in cache_stats:
+            cache_stats[counter] = 0
+    log_message("Caché de análisis limpiada")
+
+def get_analysis_cache_stats():
+    """Devuelve tamaño, aciertos, fallos y tasa de acierto de la caché de análisis"""
+    with cache_lock:
+        total = cache_stats["hits"] + cache_stats["misses"]
+        return {
+            "entradas": len(analysis_entries),
+            "aciertos": cache_stats["hits"],
+            "fallos": cache_stats["misses"],
+            "expulsiones": cache_stats["evictions"],
+            "tasa_acierto": cache_stats["hits"] / total if total else 0.0
+        }
+
+def load_analysis_cache():
+    """Carga desde disco los análisis guardados en la sesión anterior"""
+    try:
+        if not ANALYSIS_CACHE_PATH.exists():
+            return 0
+
+        with open(ANALYSIS_CACHE_PATH, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+
+        # La tolerancia forma parte de la clave: un cambio invalida lo guardado
+        if saved.get("tolerance") != cache_settings["tolerance"]:
+            log_message("Tolerancia de la caché de análisis cambiada, se descartan las entradas guardadas")
+            return 0
+
+        with cache_lock:
+            for item in saved.get("entries", []):
+                key = tuple(tuple(part) if isinstance(part, list) else part for part in item["key"])
+                # Perfiles incompletos guardados por versiones anteriores
+                if None in key[-1]:
+                    continue
+                analysis_entries[key] = item["value"]
+            while len(analysis_entries) > cache_settings["max_size"]:
+                analysis_entries.popitem(last=False)
+            loaded = len(analysis_entries)
+
+        log_message(f"Caché de análisis cargada: {loaded} entradas")
+        return loaded
+    except Exception as e:
+        log_message(f"Error al cargar caché de análisis: {e}", level='warning')
+        return 0
+
+def save_analysis_cache():
+    """Guarda la caché de análisis en disco si la persistencia está activada"""
+    if not cache_settings["persistent"]:
+        return False
+
+    try:
+        with cache_lock:
+            entries = [{"key": list(key), "value": value} for key, value in analysis_entries.items()]
+
+        ANALYSIS_CACHE_PATH.parent.mkdir(exist_ok=True)
+        # Escribir en un temporal y reemplazar para no dejar un archivo a medias
+        tmp_path = ANALYSIS_CACHE_PATH.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"tolerance": cache_settings["tolerance"], "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, ANALYSIS_CACHE_PATH)
+
+        log_message(f"Caché de análisis guardada: {len(entries)} entradas")
+        return True
+    except Exception as e:
+        log_message(f"Error al guardar caché de análisis: {e}", level='error')
+        return False
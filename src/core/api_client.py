@@ -1,5 +1,89 @@
+import random
+import threading
 import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.utils import metrics
+
+# Sesión HTTP compartida (keep-alive) para todas las consultas a la API
+http_session = None
+http_session_lock = threading.Lock()
+http_settings = {
+    "pool_size": 10,  # conexiones máximas por host
+    "retries": 2,
+    "backoff": 0.3,
+    "timeout": 10
+}
+
+# Agrupación de consultas concurrentes en llamadas bulk
+coalescer_settings = {
+    "window_ms": 20,
+    "max_batch": 50
+}
+pending_lookups = {}  # (sala, token, server_url) -> [(nick, Future), ...]
+pending_lookups_lock = threading.Lock()
+bulk_supported = {}  # server_url -> False si el servidor no tiene la ruta bulk
+
+class PlayerNotFoundError(Exception):
+    """El jugador no existe en la base de datos de la sala"""
+
+class JitteredRetry(Retry):
+    """Retry de urllib3 con backoff exponencial y jitter aleatorio (evita reintentos sincronizados)"""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+def configure_http_session(config):
+    """Aplica la configuración de pool y reintentos; la sesión se recrea en el próximo uso"""
+    global http_session
+
+    http_settings["pool_size"] = max(1, int(config.get("http_pool_size", 10)))
+    http_settings["retries"] = max(0, int(config.get("http_reintentos", 2)))
+    http_settings["backoff"] = float(config.get("http_backoff", 0.3))
+    http_settings["timeout"] = float(config.get("http_timeout", 10))
+    coalescer_settings["window_ms"] = max(0, int(config.get("api_agrupar_ms", 20)))
+    coalescer_settings["max_batch"] = max(1, int(config.get("api_lote_max", 50)))
+    bulk_supported.clear()
+
+    with http_session_lock:
+        if http_session is not None:
+            http_session.close()
+            http_session = None
+
+def get_http_session():
+    """Devuelve la sesión HTTP compartida, creándola la primera vez"""
+    global http_session
+
+    with http_session_lock:
+        if http_session is None:
+            retries = http_settings["retries"]
+            retry = JitteredRetry(
+                total=retries,
+                connect=retries,
+                read=retries,
+                status=retries,
+                backoff_factor=http_settings["backoff"],
+                status_forcelist=(500, 502, 503, 504),
+                # La consulta bulk es POST pero no modifica datos: se puede reintentar
+                allowed_methods=frozenset(["GET", "POST"]),
+                raise_on_status=False
+            )
+            # pool_maxsize limita las conexiones keep-alive por host; sin pool_block, una petición
+            # con el pool agotado abre una conexión extra en vez de esperar sin límite de tiempo
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=http_settings["pool_size"],
+                max_retries=retry
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            http_session = session
+        return http_session
 
 def get_player_stats(nick, sala, token, server_url):
     """Obtiene estadísticas del jugador desde la API"""
@@ -8,26 +92,155 @@ def get_player_stats(nick, sala, token, server_url):
         nick_encoded = urllib.parse.quote(nick, safe='')
         url = f"{server_url}/api/jugador/{sala}/{nick_encoded}"
         headers = {"Authorization": f"Bearer {token}"}
-        
-        # Realizar petición
-        response = requests.get(url, headers=headers, timeout=10)
-        
+
+        # Realizar petición (reutiliza conexiones del pool y reintenta 5xx/timeouts)
+        response = get_http_session().get(url, headers=headers, timeout=http_settings["timeout"])
+
         if response.status_code != 200:
             error_message = f"Error al obtener stats: Código {response.status_code}"
             if response.text:
                 error_message += f", {response.text}"
+            if response.status_code == 404:
+                metrics.inc_counter("pokerbot_api_peticiones_total", ruta="jugador", resultado="no_encontrado")
+                raise PlayerNotFoundError(error_message)
             raise Exception(error_message)
-        
+
         data = response.json()
+        metrics.inc_counter("pokerbot_api_peticiones_total", ruta="jugador", resultado="ok")
         return data
-    
+
+    except PlayerNotFoundError:
+        raise
+    except requests.exceptions.Timeout:
+        metrics.inc_counter("pokerbot_api_peticiones_total", ruta="jugador", resultado="error")
+        raise Exception("Timeout al conectar con la API. Verifica la conexión.")
+    except Exception:
+        metrics.inc_counter("pokerbot_api_peticiones_total", ruta="jugador", resultado="error")
+        raise
+
+def get_players_stats_bulk(nicks, sala, token, server_url):
+    """Obtiene las estadísticas de varios jugadores de una sala en una sola petición"""
+    url = f"{server_url}/api/jugadores/{sala}"
+    headers = {"Authorization": f"Bearer {token}"}
+
+    try:
+        response = get_http_session().post(url, json={"nicks": list(nicks)}, headers=headers,
+                                           timeout=http_settings["timeout"])
     except requests.exceptions.Timeout:
+        metrics.inc_counter("pokerbot_api_peticiones_total", ruta="lote", resultado="error")
         raise Exception("Timeout al conectar con la API. Verifica la conexión.")
-    
+    except Exception:
+        metrics.inc_counter("pokerbot_api_peticiones_total", ruta="lote", resultado="error")
+        raise
+
+    if response.status_code in (404, 405, 501):
+        # El servidor no implementa la ruta bulk
+        bulk_supported[server_url] = False
+        metrics.inc_counter("pokerbot_api_peticiones_total", ruta="lote", resultado="no_soportada")
+        return None
+
+    if response.status_code != 200:
+        metrics.inc_counter("pokerbot_api_peticiones_total", ruta="lote", resultado="error")
+        error_message = f"Error al obtener stats en lote: Código {response.status_code}"
+        if response.text:
+            error_message += f", {response.text}"
+        raise Exception(error_message)
+
+    bulk_supported[server_url] = True
+    metrics.inc_counter("pokerbot_api_peticiones_total", ruta="lote", resultado="ok")
+    data = response.json()
+    # Se aceptan {"jugadores": {nick: stats}} o directamente {nick: stats}
+    return data.get("jugadores", data) if isinstance(data, dict) else {}
+
+def _resolve_individually(batch, sala, token, server_url):
+    """Resuelve cada consulta pendiente con su propia petición, en paralelo"""
+    def resolve(item):
+        nick, futures = item
+        try:
+            result = get_player_stats(nick, sala, token, server_url)
+            for future in futures:
+                future.set_result(dict(result))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+
+    with ThreadPoolExecutor(max_workers=min(len(batch), http_settings["pool_size"])) as executor:
+        list(executor.map(resolve, batch.items()))
+
+def _flush_lookups(key, batch=None):
+    """Envía en una sola llamada bulk todas las consultas acumuladas para una sala"""
+    sala, token, server_url = key
+
+    if batch is None:
+        with pending_lookups_lock:
+            batch = pending_lookups.pop(key, None)
+    if not batch:
+        return
+
+    try:
+        _send_lookups(sala, token, server_url, batch)
+    except Exception as e:
+        # Un fallo inesperado (p. ej. respuesta bulk mal formada) no puede dejar esperando a nadie
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+
+def _send_lookups(sala, token, server_url, batch):
+    """Resuelve las consultas de un lote con una llamada bulk o, si no hay ruta bulk, una a una"""
+    # Agrupar nicks repetidos para consultarlos una sola vez
+    by_nick = {}
+    for nick, future in batch:
+        by_nick.setdefault(nick, []).append(future)
+
+    if len(by_nick) == 1 or bulk_supported.get(server_url) is False:
+        _resolve_individually(by_nick, sala, token, server_url)
+        return
+
+    try:
+        results = get_players_stats_bulk(list(by_nick), sala, token, server_url)
     except Exception as e:
-        # Intento alternativo con fragmento del nick
-        if ' ' in nick:
-            first_part = nick.split(' ')[0]
-            print(f"Intentando con fragmento: '{first_part}'")
-            return get_player_stats(first_part, sala, token, server_url)
-        raise
\ No newline at end of file
+        for futures in by_nick.values():
+            for future in futures:
+                future.set_exception(e)
+        return
+
+    if results is None:
+        _resolve_individually(by_nick, sala, token, server_url)
+        return
+    if not isinstance(results, dict):
+        raise Exception(f"Respuesta bulk inesperada: {type(results).__name__}")
+
+    for nick, futures in by_nick.items():
+        if nick in results and results[nick]:
+            for future in futures:
+                future.set_result(dict(results[nick]))
+        else:
+            for future in futures:
+                future.set_exception(PlayerNotFoundError(f"Jugador no encontrado: {nick}"))
+
+def fetch_player_stats(nick, sala, token, server_url):
+    """Obtiene stats agrupando con otras consultas concurrentes de la misma sala durante una ventana corta"""
+    if coalescer_settings["window_ms"] <= 0 or bulk_supported.get(server_url) is False:
+        return get_player_stats(nick, sala, token, server_url)
+
+    key = (sala, token, server_url)
+    future = Future()
+    full_batch = None
+
+    with pending_lookups_lock:
+        batch = pending_lookups.get(key)
+        if batch is None:
+            # La primera consulta abre la ventana y programa el envío
+            batch = pending_lookups[key] = []
+            timer = threading.Timer(coalescer_settings["window_ms"] / 1000, _flush_lookups, args=(key,))
+            timer.daemon = True
+            timer.start()
+        batch.append((nick, future))
+        if len(batch) >= coalescer_settings["max_batch"]:
+            full_batch = pending_lookups.pop(key)
+
+    if full_batch:
+        _flush_lookups(key, full_batch)
+
+    # Margen para reintentos y para la caída a consultas individuales
+    return future.result(timeout=http_settings["timeout"] * (http_settings["retries"] + 2))
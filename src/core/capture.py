@@ -0,0 +1,309 @@
+import ctypes
+import importlib
+import threading
+from pathlib import Path
+import numpy as np
+from PIL import Image
+
+from src.utils.logger import log_message
+
+try:
+    import win32gui
+    import win32con
+    import win32ui
+    from ctypes import wintypes
+    # Instancia propia: los prototipos declarados aquí no afectan a otros usuarios de windll
+    gdi32 = ctypes.WinDLL("gdi32")
+except (ImportError, AttributeError, OSError):  # Fuera de Windows sólo está disponible el backend replay
+    win32gui = None
+    win32con = None
+    win32ui = None
+    gdi32 = None
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    """Cabecera para leer el bitmap con GetDIBits directamente al búfer NumPy"""
+    _fields_ = [
+        ("biSize", ctypes.c_uint32), ("biWidth", ctypes.c_int32), ("biHeight", ctypes.c_int32),
+        ("biPlanes", ctypes.c_uint16), ("biBitCount", ctypes.c_uint16), ("biCompression", ctypes.c_uint32),
+        ("biSizeImage", ctypes.c_uint32), ("biXPelsPerMeter", ctypes.c_int32), ("biYPelsPerMeter", ctypes.c_int32),
+        ("biClrUsed", ctypes.c_uint32), ("biClrImportant", ctypes.c_uint32)
+    ]
+
+if gdi32 is not None:
+    # Prototipo explícito: sin él los handles se pasan como int de 32 bits y fallan en Python de 64 bits
+    gdi32.GetDIBits.argtypes = [wintypes.HDC, wintypes.HBITMAP, wintypes.UINT, wintypes.UINT,
+                                wintypes.LPVOID, ctypes.POINTER(BITMAPINFOHEADER), wintypes.UINT]
+    gdi32.GetDIBits.restype = ctypes.c_int
+
+# Backend activo y ajustes de captura
+capture_settings = {
+    "backend": "gdi",
+    "replay_dir": "capturas"
+}
+
+_thread_local = threading.local()
+
+# Contextos de captura GDI por ventana (DCs, bitmap y búfer reutilizados entre capturas)
+_contexts = {}
+_contexts_lock = threading.Lock()
+
+# Paquete opcional que necesita cada backend (no están en requirements.txt)
+BACKEND_PACKAGES = {
+    "mss": "mss",
+    "dxgi": "dxcam"
+}
+
+_replay_lock = threading.Lock()
+_replay_images = []
+_replay_index = 0
+
+def load_capture_settings(config):
+    """Selecciona el backend de captura según la configuración"""
+    global _replay_images, _replay_index
+
+    backend = config.get("captura_backend", "gdi")
+    if backend not in CAPTURE_BACKENDS:
+        log_message(f"Backend de captura desconocido '{backend}', usando gdi", level='warning')
+        backend = "gdi"
+
+    package = BACKEND_PACKAGES.get(backend)
+    if package:
+        try:
+            importlib.import_module(package)
+        except ImportError:
+            log_message(f"El backend de captura '{backend}' necesita '{package}' (pip install {package}), "
+                        "usando gdi", level='warning')
+            backend = "gdi"
+
+    capture_settings["backend"] = backend
+    capture_settings["replay_dir"] = config.get("captura_replay_dir", "capturas")
+
+    with _replay_lock:
+        _replay_images = []
+        _replay_index = 0
+
+    log_message(f"Backend de captura: {backend}")
+    return backend
+
+def supports_input():
+    """Indica si el backend activo trabaja sobre ventanas reales (clics, foco y pegado)"""
+    return capture_settings["backend"] != "replay"
+
+def get_window_rect(hwnd):
+    """Devuelve (left, top, right, bottom) de la ventana en coordenadas de pantalla"""
+    if not supports_input():
+        return (0, 0, 0, 0)
+    return win32gui.GetWindowRect(hwnd)
+
+def capture_region(hwnd, region):
+    """Captura una región (x, y, w, h) relativa a la ventana con el backend activo"""
+    return CAPTURE_BACKENDS[capture_settings["backend"]](hwnd, region)
+
+def capture_regions(hwnd, regions):
+    """Captura varias regiones de una ventana a partir de un único frame"""
+    if capture_settings["backend"] == "gdi":
+        return _capture_regions_gdi(hwnd, regions)
+
+    # Resto de backends: una captura del rectángulo que engloba todas las regiones
+    left = min(x for x, _, _, _ in regions)
+    top = min(y for _, y, _, _ in regions)
+    right = max(x + w for x, _, w, _ in regions)
+    bottom = max(y + h for _, y, _, h in regions)
+    img = capture_region(hwnd, (left, top, right - left, bottom - top))
+    return [img.crop((x - left, y - top, x - left + w, y - top + h)) for x, y, w, h in regions]
+
+def region_view(frame, region):
+    """Vista NumPy (sin copia) de una región (x, y, w, h) de un frame"""
+    x, y, w, h = region
+    return frame[y:y + h, x:x + w]
+
+def frame_to_image(view):
+    """Convierte una vista BGRA del frame en una PIL Image RGB (copia sólo la región)"""
+    return Image.fromarray(np.ascontiguousarray(view[:, :, 2::-1]))
+
+class WindowCapture:
+    """Recursos GDI y búfer de una ventana, reutilizados mientras no cambie su tamaño"""
+
+    def __init__(self, hwnd):
+        self.hwnd = hwnd
+        self.lock = threading.Lock()
+        self.size = None
+        self.window_dc = None
+        self.source_dc = None
+        self.memory_dc = None
+        self.bitmap = None
+        self.header = None
+        self.buffer = None
+        self.frames = 0
+
+    def _allocate(self, width, height):
+        """Crea DCs, bitmap y búfer para el tamaño actual de la ventana"""
+        self.release()
+        self.window_dc = win32gui.GetWindowDC(self.hwnd)
+        self.source_dc = win32ui.CreateDCFromHandle(self.window_dc)
+        self.memory_dc = self.source_dc.CreateCompatibleDC()
+        self.bitmap = win32ui.CreateBitmap()
+        self.bitmap.CreateCompatibleBitmap(self.source_dc, width, height)
+
+        # Altura negativa: filas de arriba abajo, igual que el array
+        self.header = BITMAPINFOHEADER(ctypes.sizeof(BITMAPINFOHEADER), width, -height, 1, 32, 0, 0, 0, 0, 0, 0)
+        self.buffer = np.empty((height, width, 4), dtype=np.uint8)
+        self.size = (width, height)
+
+    def grab(self):
+        """Copia la ventana completa al búfer y lo devuelve como array BGRA (llamar con lock)"""
+        left, top, right, bottom = win32gui.GetWindowRect(self.hwnd)
+        width, height = right - left, bottom - top
+        if width <= 0 or height <= 0:
+            raise RuntimeError(f"Ventana {self.hwnd} sin área visible")
+        if self.size != (width, height):
+            self._allocate(width, height)
+
+        # GetDIBits no admite un bitmap seleccionado en un DC: solo lo está durante el BitBlt
+        previous = self.memory_dc.SelectObject(self.bitmap)
+        try:
+            self.memory_dc.BitBlt((0, 0), (width, height), self.source_dc, (0, 0), win32con.SRCCOPY)
+        finally:
+            self.memory_dc.SelectObject(previous)
+        lines = gdi32.GetDIBits(self.memory_dc.GetSafeHdc(), self.bitmap.GetHandle(), 0, height,
+                                self.buffer.ctypes.data, ctypes.byref(self.header), 0)
+        if lines != height:
+            raise RuntimeError(f"GetDIBits leyó {lines}/{height} filas de la ventana {self.hwnd}")
+        self.frames += 1
+        return self.buffer
+
+    def release(self):
+        """Libera los objetos GDI (el bitmap ya no está seleccionado en ningún DC)"""
+        if self.window_dc is None:
+            return
+        for step in (lambda: self.memory_dc.DeleteDC(),
+                     lambda: win32gui.DeleteObject(self.bitmap.GetHandle()),
+                     lambda: self.source_dc.DeleteDC(),
+                     lambda: win32gui.ReleaseDC(self.hwnd, self.window_dc)):
+            try:
+                step()
+            except Exception:
+                pass
+        self.window_dc = self.source_dc = self.memory_dc = self.bitmap = None
+        self.buffer = None
+        self.size = None
+
+def get_capture_context(hwnd):
+    """Devuelve el contexto de captura de una ventana, creándolo la primera vez"""
+    with _contexts_lock:
+        context = _contexts.get(hwnd)
+        if context is None:
+            context = _contexts[hwnd] = WindowCapture(hwnd)
+        return context
+
+def release_capture_context(hwnd):
+    """Libera los recursos de captura de una ventana"""
+    with _contexts_lock:
+        context = _contexts.pop(hwnd, None)
+    if context is not None:
+        with context.lock:
+            context.release()
+
+def prune_capture_contexts(open_hwnds=None):
+    """Libera los contextos de ventanas cerradas o que ya no están en la lista de mesas"""
+    with _contexts_lock:
+        hwnds = list(_contexts)
+    closed = [hwnd for hwnd in hwnds
+              if (open_hwnds is not None and hwnd not in open_hwnds) or
+              (win32gui is not None and not win32gui.IsWindow(hwnd))]
+    for hwnd in closed:
+        release_capture_context(hwnd)
+    return len(closed)
+
+def shutdown_capture():
+    """Libera los recursos de captura de todas las ventanas"""
+    with _contexts_lock:
+        hwnds = list(_contexts)
+    for hwnd in hwnds:
+        release_capture_context(hwnd)
+
+def _capture_regions_gdi(hwnd, regions):
+    """Un BitBlt de la ventana completa y un recorte por región"""
+    context = get_capture_context(hwnd)
+    try:
+        with context.lock:
+            frame = context.grab()
+            # Las vistas apuntan al búfer reutilizable: se copian antes de soltar el lock
+            return [frame_to_image(region_view(frame, region)) for region in regions]
+    except Exception:
+        # La ventana pudo cerrarse o cambiar: no conservar sus recursos
+        release_capture_context(hwnd)
+        raise
+
+def _capture_gdi(hwnd, region):
+    """Captura una región de una ventana usando GDI BitBlt sobre el contexto reutilizable"""
+    return _capture_regions_gdi(hwnd, [region])[0]
+
+def _capture_mss(hwnd, region):
+    """Captura con mss, que mantiene abierto el DC de pantalla entre capturas"""
+    # mss no es thread-safe: una instancia por hilo
+    sct = getattr(_thread_local, "mss", None)
+    if sct is None:
+        import mss
+        sct = mss.mss()
+        _thread_local.mss = sct
+
+    x, y, w, h = region
+    left, top, _, _ = win32gui.GetWindowRect(hwnd)
+    shot = sct.grab({"left": left + x, "top": top + y, "width": w, "height": h})
+    return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+def _capture_dxgi(hwnd, region):
+    """Captura con Desktop Duplication (DXGI) a través de dxcam"""
+    camera = getattr(_thread_local, "dxcam", None)
+    if camera is None:
+        import dxcam
+        camera = dxcam.create(output_color="RGB")
+        _thread_local.dxcam = camera
+
+    x, y, w, h = region
+    left, top, _, _ = win32gui.GetWindowRect(hwnd)
+    frame = camera.grab(region=(left + x, top + y, left + x + w, top + y + h))
+    if frame is None:
+        # DXGI sólo entrega frames cuando la pantalla cambió: recurrir a GDI
+        return _capture_gdi(hwnd, region)
+    return Image.fromarray(frame)
+
+def _load_replay_images():
+    """Carga en memoria los PNG del directorio de replay"""
+    directory = Path(capture_settings["replay_dir"])
+    files = sorted(directory.glob("*.png")) if directory.exists() else []
+    images = []
+    for path in files:
+        try:
+            with Image.open(path) as img:
+                images.append(img.convert("RGB"))
+        except Exception as e:
+            log_message(f"No se pudo cargar captura de replay {path}: {e}", level='warning')
+    log_message(f"Replay de capturas: {len(images)} imágenes cargadas desde {directory}")
+    return images
+
+def _capture_replay(hwnd, region):
+    """Sirve las capturas guardadas en disco en orden circular (benchmarks sin Windows)"""
+    global _replay_images, _replay_index
+
+    with _replay_lock:
+        if not _replay_images:
+            _replay_images = _load_replay_images()
+            if not _replay_images:
+                raise RuntimeError(f"No hay imágenes PNG en {capture_settings['replay_dir']}")
+        img = _replay_images[_replay_index % len(_replay_images)]
+        _replay_index += 1
+
+    x, y, w, h = region
+    # Las capturas guardadas ya son el recorte del nick; las ventanas completas se recortan
+    if img.width >= x + w and img.height >= y + h and (img.width, img.height) != (w, h):
+        return img.crop((x, y, x + w, y + h))
+    return img.copy()
+
+CAPTURE_BACKENDS = {
+    "gdi": _capture_gdi,
+    "mss": _capture_mss,
+    "dxgi": _capture_dxgi,
+    "replay": _capture_replay
+}
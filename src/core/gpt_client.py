@@ -1,8 +1,50 @@
+import time
+import threading
+import httpx
 from openai import OpenAI
 
+# Clientes OpenAI compartidos por (api_key, base_url): reutilizan conexiones HTTP entre análisis
+openai_clients = {}
+openai_clients_lock = threading.Lock()
+openai_settings = {
+    "base_url": None,  # None = API oficial; permite apuntar a un servidor local compatible
+    "timeout": 30.0,
+    "max_connections": 10
+}
+
+def configure_openai(config):
+    """Aplica URL base, timeout y límites de conexión; los clientes se recrean en el próximo uso"""
+    openai_settings["base_url"] = config.get("openai_base_url") or None
+    openai_settings["timeout"] = float(config.get("openai_timeout", 30))
+    openai_settings["max_connections"] = max(1, int(config.get("openai_max_conexiones", 10)))
+
+    with openai_clients_lock:
+        for client in openai_clients.values():
+            client.close()
+        openai_clients.clear()
+
+def get_openai_client(api_key, base_url=None):
+    """Devuelve el cliente OpenAI compartido para la clave y URL base, creándolo la primera vez"""
+    key = (api_key, base_url)
+
+    with openai_clients_lock:
+        client = openai_clients.get(key)
+        if client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=openai_settings["max_connections"],
+                    max_keepalive_connections=openai_settings["max_connections"]
+                ),
+                timeout=httpx.Timeout(openai_settings["timeout"], connect=5.0)
+            )
+            # Los reintentos los hace analyze_stats: el cliente no reintenta por su cuenta
+            client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+            openai_clients[key] = client
+        return client
+
 def analyze_stats(data, api_key, nick="Jugador"):
     """Analiza estadísticas de poker usando GPT"""
-    client = OpenAI(api_key=api_key)
+    client = get_openai_client(api_key, openai_settings["base_url"])
     
     try:
         # Calcular gap VPIP-PFR
@@ -1,52 +1,360 @@
 import json
-import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from src.utils.logger import log_message
+from src.core import history_search
 
 HISTORY_PATH = Path("config/historial.json")
+HISTORY_DB_PATH = Path("config/historial.db")
 
-def load_history():
-    """Carga el historial de búsquedas desde el archivo"""
+# Retención del historial (0 = sin límite) y escritura diferida
+history_settings = {
+    "retention_days": 0,
+    "max_entries": 0,
+    "retention_every": 500,  # inserciones entre aplicaciones de la retención
+    "flush_delay": 1.0  # segundos que se agrupan cambios antes de escribirlos en disco
+}
+inserts_since_retention = 0
+
+# Columnas de la tabla en el mismo orden que los campos de cada entrada
+HISTORY_FIELDS = ("timestamp", "nick", "sala", "stats", "analisis", "notas")
+
+# Conexión SQLite compartida; el lock serializa el acceso entre hilos
+db_connection = None
+db_lock = threading.RLock()
+
+# Repositorio en memoria: id -> entrada (en orden de id) e índice (nick, sala) -> id
+history_entries = {}
+history_index = {}
+history_loaded = False
+history_version = 0  # aumenta con cada cambio; permite a la UI saber si debe refrescar
+next_entry_id = 1
+history_lock = threading.RLock()
+
+# Cambios pendientes de escribir en disco
+dirty_ids = set()
+deleted_ids = set()
+clear_pending = False
+flush_timer = None
+# Una escritura a la vez: la instantánea de cambios y su commit no se intercalan con otra
+flush_lock = threading.Lock()
+# Tras close_history no hay temporizador que sobreviva al cierre: se escribe al momento
+history_closed = False
+
+def get_connection():
+    """Devuelve la conexión a la base de datos del historial, creándola la primera vez"""
+    global db_connection
+
+    with db_lock:
+        if db_connection is None:
+            HISTORY_DB_PATH.parent.mkdir(exist_ok=True)
+            connection = sqlite3.connect(str(HISTORY_DB_PATH), check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            # WAL: las lecturas no bloquean a las escrituras y cada insert no reescribe el archivo
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            _create_schema(connection)
+            db_connection = connection
+            _import_json_history(connection)
+        return db_connection
+
+def close_history():
+    """Escribe los cambios pendientes y cierra la base de datos del historial"""
+    global db_connection, history_loaded, history_closed
+
+    with history_lock:
+        history_closed = True
+    flush_history()
+
+    with history_lock:
+        history_entries.clear()
+        history_index.clear()
+        history_search.clear_index()
+        history_loaded = False
+
+    with db_lock:
+        if db_connection is not None:
+            db_connection.close()
+            db_connection = None
+
+def _create_schema(connection):
+    """Crea la tabla del historial y sus índices si no existen"""
+    with connection:
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS historial (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL DEFAULT '',
+                nick TEXT NOT NULL DEFAULT '',
+                sala TEXT NOT NULL DEFAULT '',
+                stats TEXT NOT NULL DEFAULT '',
+                analisis TEXT,
+                notas TEXT
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_historial_nick_sala ON historial (nick, sala)")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_historial_timestamp ON historial (timestamp)")
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+
+def _import_json_history(connection):
+    """Importa una sola vez el historial del antiguo archivo JSON"""
     try:
-        if not HISTORY_PATH.exists():
-            # Crear archivo vacío si no existe
-            HISTORY_PATH.parent.mkdir(exist_ok=True)
-            with open(HISTORY_PATH, "w", encoding="utf-8") as f:
-                f.write("[]")
-            log_message("Archivo de historial no encontrado, se creó uno nuevo")
-            return []
-        
+        imported = connection.execute("SELECT valor FROM meta WHERE clave = 'json_importado'").fetchone()
+        if imported or not HISTORY_PATH.exists():
+            return 0
+
         with open(HISTORY_PATH, "r", encoding="utf-8") as f:
             content = f.read()
-            if not content.strip():
-                log_message("Archivo de historial está vacío")
-                return []
-                
-            history = json.loads(content)
-            if not isinstance(history, list):
-                log_message("Error: El archivo de historial no contiene una lista válida", level='error')
-                return []
-                
-            log_message(f"Historial cargado: {len(history)} entradas")
-            return history
-    except json.JSONDecodeError as e:
-        log_message(f"Error al decodificar JSON del historial: {e}", level='error')
-        # Crear copia de seguridad del archivo corrupto
-        if HISTORY_PATH.exists():
-            from datetime import datetime
-            backup_name = f"config/historial_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            try:
-                import shutil
-                shutil.copy(HISTORY_PATH, backup_name)
-                log_message(f"Copia de seguridad creada: {backup_name}")
-                
-                # Crear un nuevo archivo vacío
-                with open(HISTORY_PATH, "w", encoding="utf-8") as f:
-                    f.write("[]")
-                log_message("Se creó un nuevo archivo de historial vacío")
-            except Exception as backup_error:
-                log_message(f"Error al crear copia de seguridad: {backup_error}", level='error')
-        return []
+        history = json.loads(content) if content.strip() else []
+        if not isinstance(history, list):
+            log_message("Error: El archivo de historial no contiene una lista válida", level='error')
+            history = []
+
+        with connection:
+            connection.executemany(
+                "INSERT INTO historial (timestamp, nick, sala, stats, analisis, notas) VALUES (?, ?, ?, ?, ?, ?)",
+                [_entry_values(entry) for entry in history if isinstance(entry, dict)]
+            )
+            connection.execute("INSERT INTO meta (clave, valor) VALUES ('json_importado', ?)", (str(len(history)),))
+
+        log_message(f"Historial importado desde {HISTORY_PATH}: {len(history)} entradas")
+        return len(history)
+    except Exception as e:
+        log_message(f"Error al importar historial JSON: {e}", level='error')
+        import traceback
+        log_message(traceback.format_exc(), level='error')
+        return 0
+
+def _entry_values(entry):
+    """Convierte una entrada del historial en la tupla de valores de la tabla"""
+    return tuple(
+        entry.get(field) if field in ("analisis", "notas") else entry.get(field, "")
+        for field in HISTORY_FIELDS
+    )
+
+def _row_to_entry(row):
+    """Convierte una fila de la tabla en una entrada del historial"""
+    entry = {
+        "timestamp": row["timestamp"],
+        "nick": row["nick"],
+        "stats": row["stats"],
+        "analisis": row["analisis"] or "",
+        "sala": row["sala"]
+    }
+    if row["notas"] is not None:
+        entry["notas"] = row["notas"]
+    return entry
+
+def _normalize_entry(entry):
+    """Copia una entrada con los campos que se guardan en el historial"""
+    normalized = {
+        "timestamp": entry.get("timestamp", ""),
+        "nick": entry.get("nick", ""),
+        "stats": entry.get("stats", ""),
+        "analisis": entry.get("analisis") or "",
+        "sala": entry.get("sala", "")
+    }
+    if entry.get("notas") is not None:
+        normalized["notas"] = entry["notas"]
+    return normalized
+
+def _ensure_loaded():
+    """Carga el historial en memoria la primera vez que se usa"""
+    global history_loaded, next_entry_id
+
+    with history_lock:
+        if history_loaded:
+            return
+
+        with db_lock:
+            rows = get_connection().execute("SELECT * FROM historial ORDER BY id").fetchall()
+
+        history_entries.clear()
+        history_index.clear()
+        for row in rows:
+            history_entries[row["id"]] = _row_to_entry(row)
+            # El índice apunta a la entrada más reciente de cada jugador
+            history_index[(row["nick"], row["sala"])] = row["id"]
+
+        next_entry_id = (rows[-1]["id"] + 1) if rows else 1
+        history_search.rebuild_index(history_entries)
+        history_loaded = True
+        log_message(f"Historial cargado en memoria: {len(history_entries)} entradas")
+
+def _mark_changed(entry_id=None, deleted=False):
+    """Registra un cambio para la próxima escritura en disco (llamar con history_lock)"""
+    global history_version
+
+    history_version += 1
+    if entry_id is not None:
+        if deleted:
+            dirty_ids.discard(entry_id)
+            deleted_ids.add(entry_id)
+        else:
+            dirty_ids.add(entry_id)
+    _schedule_flush()
+
+def _schedule_flush():
+    """Programa la escritura diferida si no hay una pendiente (llamar con history_lock)"""
+    global flush_timer
+
+    if flush_timer is None and not history_closed:
+        flush_timer = threading.Timer(history_settings["flush_delay"], _flush_from_timer)
+        flush_timer.daemon = True
+        flush_timer.start()
+
+def _flush_from_timer():
+    """Escritura diferida lanzada por el temporizador"""
+    global flush_timer
+
+    with history_lock:
+        flush_timer = None
+    flush_history()
+
+def _flush_if_closed():
+    """Escribe al momento los cambios que llegan después de cerrar el historial"""
+    if history_closed:
+        flush_history()
+
+def _remove_entry(entry_id):
+    """Quita una entrada del repositorio en memoria (llamar con history_lock)"""
+    entry = history_entries.pop(entry_id, None)
+    if entry is None:
+        return
+    key = (entry["nick"], entry["sala"])
+    if history_index.get(key) == entry_id:
+        del history_index[key]
+    history_search.remove_entry(entry_id)
+    _mark_changed(entry_id, deleted=True)
+
+def flush_history():
+    """Escribe en disco, en una sola transacción, los cambios acumulados del historial"""
+    with flush_lock:
+        return _write_pending_changes()
+
+def _write_pending_changes():
+    """Toma los cambios pendientes y los confirma en la base de datos (llamar con flush_lock)"""
+    global clear_pending, flush_timer
+
+    with history_lock:
+        if flush_timer is not None:
+            flush_timer.cancel()
+            flush_timer = None
+        if not dirty_ids and not deleted_ids and not clear_pending:
+            return True
+
+        do_clear = clear_pending
+        upserts = [(entry_id,) + _entry_values(history_entries[entry_id])
+                   for entry_id in sorted(dirty_ids) if entry_id in history_entries]
+        deletes = [(entry_id,) for entry_id in deleted_ids]
+        pending_dirty, pending_deleted = set(dirty_ids), set(deleted_ids)
+        dirty_ids.clear()
+        deleted_ids.clear()
+        clear_pending = False
+
+    try:
+        with db_lock:
+            connection = get_connection()
+            # Una transacción: si falla, la base de datos queda como antes
+            with connection:
+                if do_clear:
+                    connection.execute("DELETE FROM historial")
+                connection.executemany("DELETE FROM historial WHERE id = ?", deletes)
+                connection.executemany(
+                    "INSERT OR REPLACE INTO historial (id, timestamp, nick, sala, stats, analisis, notas) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    upserts
+                )
+        return True
+    except Exception as e:
+        log_message(f"Error al guardar historial: {e}", level='error')
+        import traceback
+        log_message(traceback.format_exc(), level='error')
+
+        # Conservar los cambios para el próximo intento
+        with history_lock:
+            clear_pending = clear_pending or do_clear
+            dirty_ids.update(pending_dirty - deleted_ids)
+            deleted_ids.update(pending_deleted - dirty_ids)
+            _schedule_flush()
+        return False
+
+def get_history_version():
+    """Devuelve un contador que cambia cada vez que se modifica el historial"""
+    return history_version
+
+def load_history_settings(config):
+    """Actualiza la política de retención del historial, la aplica y compacta la base de datos"""
+    history_settings["retention_days"] = max(0, int(config.get("historial_retencion_dias", 0)))
+    history_settings["max_entries"] = max(0, int(config.get("historial_max_entradas", 0)))
+    history_settings["flush_delay"] = max(0, int(config.get("historial_flush_ms", 1000))) / 1000
+    removed = apply_history_retention()
+    # VACUUM reescribe el archivo: sólo compensa tras borrados grandes
+    compact_history(vacuum=removed >= 1000)
+
+def apply_history_retention():
+    """Elimina las entradas más antiguas que los días configurados o por encima del máximo"""
+    global inserts_since_retention
+
+    try:
+        _ensure_loaded()
+        with history_lock:
+            expired = []
+            if history_settings["retention_days"]:
+                cutoff = datetime.now() - timedelta(days=history_settings["retention_days"])
+                # Las fechas se guardan como "%Y-%m-%d %H:%M:%S": el orden de texto es cronológico
+                cutoff_text = cutoff.strftime("%Y-%m-%d %H:%M:%S")
+                expired = [i for i, e in history_entries.items() if e["timestamp"] < cutoff_text]
+
+            excess = len(history_entries) - len(expired) - history_settings["max_entries"]
+            if history_settings["max_entries"] and excess > 0:
+                expired_set = set(expired)
+                oldest = (i for i in history_entries if i not in expired_set)
+                expired.extend(next(oldest) for _ in range(excess))
+
+            for entry_id in expired:
+                _remove_entry(entry_id)
+            inserts_since_retention = 0
+
+        if expired:
+            log_message(f"Retención del historial: {len(expired)} entradas eliminadas")
+        return len(expired)
+    except Exception as e:
+        log_message(f"Error al aplicar retención del historial: {e}", level='error')
+        return 0
+
+def compact_history(vacuum=False):
+    """Elimina entradas duplicadas de un mismo jugador y devuelve el espacio libre al disco"""
+    try:
+        _ensure_loaded()
+        with history_lock:
+            # Por jugador y sala sólo se conserva la entrada más reciente
+            latest = set(history_index.values())
+            superseded = [i for i in history_entries if i not in latest]
+            for entry_id in superseded:
+                _remove_entry(entry_id)
+
+        flush_history()
+        with db_lock:
+            connection = get_connection()
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            if vacuum:
+                connection.execute("VACUUM")
+
+        log_message(f"Historial compactado: {len(superseded)} entradas duplicadas eliminadas")
+        return len(superseded)
+    except Exception as e:
+        log_message(f"Error al compactar historial: {e}", level='error')
+        return 0
+
+def load_history():
+    """Devuelve una copia del historial completo, de la entrada más antigua a la más reciente"""
+    try:
+        _ensure_loaded()
+        with history_lock:
+            return [dict(entry) for entry in history_entries.values()]
     except Exception as e:
         log_message(f"Error al cargar historial: {e}", level='error')
         import traceback
@@ -54,22 +362,33 @@ def load_history():
         return []
 
 def save_history(history):
-    """Guarda el historial en el archivo"""
+    """Reemplaza el historial completo por la lista indicada"""
+    global clear_pending, next_entry_id
+
     try:
         # Verificar que es una lista
         if not isinstance(history, list):
             log_message("Advertencia: Historial no es una lista. Inicializando.", level='warning')
             history = []
-        
-        # Limitar a 100 entradas más recientes
-        limited_history = history[-100:] if len(history) > 100 else history
-        
-        # Guardar en archivo
-        HISTORY_PATH.parent.mkdir(exist_ok=True)
-        with open(HISTORY_PATH, "w", encoding="utf-8") as f:
-            json.dump(limited_history, f, indent=4, ensure_ascii=False)
-            
-        log_message(f"Historial guardado: {len(limited_history)} entradas")
+
+        _ensure_loaded()
+        with history_lock:
+            history_entries.clear()
+            history_index.clear()
+            dirty_ids.clear()
+            deleted_ids.clear()
+            clear_pending = True
+            for entry in history:
+                entry_id = next_entry_id
+                next_entry_id += 1
+                history_entries[entry_id] = _normalize_entry(entry)
+                history_index[(entry.get("nick", ""), entry.get("sala", ""))] = entry_id
+                dirty_ids.add(entry_id)
+            history_search.rebuild_index(history_entries)
+            _mark_changed()
+        _flush_if_closed()
+
+        log_message(f"Historial guardado: {len(history)} entradas")
         return True
     except Exception as e:
         log_message(f"Error al guardar historial: {e}", level='error')
@@ -79,67 +398,150 @@ def save_history(history):
 
 def add_to_history(entry):
     """Añade una entrada al historial, reemplazando entradas existentes del mismo jugador si los stats cambiaron"""
+    global inserts_since_retention, next_entry_id
+
     try:
-        history = load_history()
-        log_message(f"Historial cargado para agregar entrada: {len(history)} entradas existentes")
-        
-        # Extraer información de la entrada actual
         current_nick = entry.get("nick", "")
         current_stats = entry.get("stats", "")
         current_sala = entry.get("sala", "")
-        
-        # Buscar si el jugador ya existe en el historial
-        existing_index = None
-        
-        for i, hist_entry in enumerate(history):
-            if hist_entry.get("nick") == current_nick and hist_entry.get("sala") == current_sala:
-                existing_index = i
-                break
-        
-        # Si el jugador existe, verificar si los stats son diferentes
-        if existing_index is not None:
-            existing_stats = history[existing_index].get("stats", "")
-            
-            if existing_stats == current_stats:
-                # Los stats son iguales, no hacer nada
-                log_message(f"Jugador {current_nick} ya existe con los mismos stats, no se agrega al historial")
-                return True
-            else:
+
+        _ensure_loaded()
+        with history_lock:
+            # Buscar si el jugador ya existe en el historial (índice nick, sala)
+            existing_id = history_index.get((current_nick, current_sala))
+
+            if existing_id is not None:
+                if history_entries[existing_id]["stats"] == current_stats:
+                    # Los stats son iguales, no hacer nada
+                    log_message(f"Jugador {current_nick} ya existe con los mismos stats, no se agrega al historial")
+                    return True
+
                 # Los stats son diferentes, reemplazar la entrada
                 log_message(f"Actualizando stats para jugador {current_nick}")
-                history[existing_index] = entry
-        else:
-            # El jugador no existe, agregar nueva entrada
-            history.append(entry)
-        
-        success = save_history(history)
-        
-        if success:
-            log_message(f"Entrada añadida/actualizada en el historial. Total: {len(history)} entradas")
-        else:
-            log_message("No se pudo guardar la entrada en el historial", level='warning')
-        
-        return success
+                history_entries[existing_id] = _normalize_entry(entry)
+                history_search.index_entry(existing_id, history_entries[existing_id])
+                _mark_changed(existing_id)
+            else:
+                # El jugador no existe, agregar nueva entrada
+                entry_id = next_entry_id
+                next_entry_id += 1
+                history_entries[entry_id] = _normalize_entry(entry)
+                history_index[(current_nick, current_sala)] = entry_id
+                history_search.index_entry(entry_id, history_entries[entry_id])
+                _mark_changed(entry_id)
+                inserts_since_retention += 1
+
+        # La retención se aplica por lotes para no recorrer el historial en cada inserción
+        if inserts_since_retention >= history_settings["retention_every"]:
+            apply_history_retention()
+        _flush_if_closed()
+
+        log_message(f"Entrada añadida/actualizada en el historial: {current_nick}")
+        return True
     except Exception as e:
         log_message(f"Error al añadir entrada al historial: {e}", level='error')
         import traceback
         log_message(traceback.format_exc(), level='error')
         return False
-    
+
+def load_history_page(offset=0, limit=100, search=None):
+    """Devuelve una página del historial: la más reciente primero o, al buscar, por relevancia"""
+    try:
+        _ensure_loaded()
+        with history_lock:
+            if search:
+                ids = history_search.search_history(search)[offset:offset + limit]
+                return [dict(history_entries[entry_id]) for entry_id in ids if entry_id in history_entries]
+
+            page = []
+            for index, entry_id in enumerate(reversed(history_entries)):
+                if index < offset:
+                    continue
+                page.append(dict(history_entries[entry_id]))
+                if len(page) >= limit:
+                    break
+            return page
+    except Exception as e:
+        log_message(f"Error al cargar página del historial: {e}", level='error')
+        return []
+
+def count_history(search=None):
+    """Devuelve el número de entradas del historial (filtradas por texto si se indica)"""
+    try:
+        _ensure_loaded()
+        with history_lock:
+            if not search:
+                return len(history_entries)
+            return len(history_search.search_history(search))
+    except Exception as e:
+        log_message(f"Error al contar historial: {e}", level='error')
+        return 0
+
+def _find_entry_id(timestamp, nick):
+    """Busca el id de la entrada con la fecha y el nick indicados (llamar con history_lock)"""
+    for entry_id in reversed(history_entries):
+        entry = history_entries[entry_id]
+        if entry["timestamp"] == timestamp and entry["nick"] == nick:
+            return entry_id
+    return None
+
+def update_history_entry(timestamp, nick, changes):
+    """Actualiza campos (p. ej. notas) de la entrada identificada por fecha y nick"""
+    try:
+        # nick y sala forman la clave del índice: no se cambian aquí
+        fields = [field for field in changes if field in HISTORY_FIELDS and field not in ("nick", "sala")]
+        if not fields:
+            return False
+
+        _ensure_loaded()
+        with history_lock:
+            entry_id = _find_entry_id(timestamp, nick)
+            if entry_id is None:
+                return False
+            for field in fields:
+                history_entries[entry_id][field] = changes[field]
+            history_search.index_entry(entry_id, history_entries[entry_id])
+            _mark_changed(entry_id)
+        _flush_if_closed()
+        return True
+    except Exception as e:
+        log_message(f"Error al actualizar entrada del historial: {e}", level='error')
+        return False
+
+def find_history_entry(timestamp, nick):
+    """Busca la entrada del historial con la fecha y el nick indicados"""
+    try:
+        _ensure_loaded()
+        with history_lock:
+            entry_id = _find_entry_id(timestamp, nick)
+            return dict(history_entries[entry_id]) if entry_id is not None else None
+    except Exception as e:
+        log_message(f"Error al buscar entrada del historial: {e}", level='error')
+        return None
+
+def get_last_history_entry():
+    """Devuelve la última entrada añadida al historial"""
+    try:
+        _ensure_loaded()
+        with history_lock:
+            if not history_entries:
+                return None
+            return dict(history_entries[next(reversed(history_entries))])
+    except Exception as e:
+        log_message(f"Error al obtener última entrada del historial: {e}", level='error')
+        return None
+
 def find_existing_analysis(nick, stats, sala):
     """Busca un análisis existente para un jugador con stats idénticos"""
     try:
-        history = load_history()
-        
-        for entry in history:
-            if (entry.get("nick") == nick and 
-                entry.get("stats") == stats and 
-                entry.get("sala") == sala and
-                "analisis" in entry and entry["analisis"]):
-                
+        _ensure_loaded()
+        with history_lock:
+            entry_id = history_index.get((nick, sala))
+            entry = history_entries.get(entry_id) if entry_id is not None else None
+            if entry and entry["stats"] == stats and entry["analisis"]:
                 log_message(f"Análisis existente encontrado para {nick} con los mismos stats")
                 return entry["analisis"]
-        
+
         return None
     except Exception as e:
         log_message(f"Error al buscar análisis existente: {e}", level='error')
@@ -148,10 +550,101 @@ def find_existing_analysis(nick, stats, sala):
 
 def clear_history():
     """Limpia todo el historial"""
+    global clear_pending
+
     try:
-        save_history([])
+        _ensure_loaded()
+        with history_lock:
+            history_entries.clear()
+            history_index.clear()
+            dirty_ids.clear()
+            deleted_ids.clear()
+            clear_pending = True
+            history_search.clear_index()
+            _mark_changed()
+        _flush_if_closed()
         log_message("Historial limpiado completamente")
         return True
     except Exception as e:
         log_message(f"Error al limpiar historial: {e}", level='error')
-        return False
\ No newline at end of file
+        return False
+
+def benchmark_history(n=100000, lookups=1000):
+    """Mide inserción y búsqueda en un historial temporal de n entradas"""
+    global HISTORY_DB_PATH, HISTORY_PATH, history_closed
+    import random
+    import tempfile
+
+    original_paths = (HISTORY_DB_PATH, HISTORY_PATH)
+    was_closed = history_closed
+    close_history()
+    # El cierre previo no es el de salida: la escritura diferida sigue activa durante la medición
+    history_closed = False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Base temporal y sin JSON que importar
+        HISTORY_DB_PATH = Path(tmp_dir) / "historial_benchmark.db"
+        HISTORY_PATH = Path(tmp_dir) / "historial.json"
+        try:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            start = time.perf_counter()
+            for i in range(n):
+                add_to_history({
+                    "timestamp": timestamp,
+                    "nick": f"jugador{i}",
+                    "stats": f"VPIP:{i % 60} PFR:{i % 40}",
+                    "analisis": f"Análisis de prueba {i}",
+                    "sala": "XPK"
+                })
+            insert_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            flush_history()
+            flush_s = time.perf_counter() - start
+
+            sample = [random.randrange(n) for _ in range(lookups)]
+            start = time.perf_counter()
+            for i in sample:
+                find_existing_analysis(f"jugador{i}", f"VPIP:{i % 60} PFR:{i % 40}", "XPK")
+            lookup_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for page in range(100):
+                load_history_page(page * 50, 50)
+            page_s = time.perf_counter() - start
+
+            queries = [f"jugador{i}" for i in sample[:100]] + ["vpip:5", "prueba 99", "ju"]
+            start = time.perf_counter()
+            for query in queries:
+                load_history_page(0, 50, query)
+            search_s = time.perf_counter() - start
+
+            # Recarga completa desde disco para comprobar la escritura diferida
+            close_history()
+            history_closed = False
+            start = time.perf_counter()
+            entries = count_history()
+            reload_s = time.perf_counter() - start
+
+            return {
+                "entradas": entries,
+                "insercion_ms": insert_s / n * 1000,
+                "escritura_s": flush_s,
+                "busqueda_ms": lookup_s / lookups * 1000,
+                "pagina_ms": page_s / 100 * 1000,
+                "busqueda_texto_ms": search_s / len(queries) * 1000,
+                "recarga_s": reload_s
+            }
+        finally:
+            close_history()
+            history_closed = was_closed
+            HISTORY_DB_PATH, HISTORY_PATH = original_paths
+
+if __name__ == "__main__":
+    # python -m src.core.history_manager [entradas]
+    import sys
+    import logging
+
+    # Sin registro por entrada durante la medición
+    logging.disable(logging.INFO)
+    print(benchmark_history(int(sys.argv[1]) if len(sys.argv) > 1 else 100000))
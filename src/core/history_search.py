@@ -0,0 +1,188 @@
+import re
+import threading
+from array import array
+
+# Palabras de stats y análisis (\w incluye letras CJK, acentos y dígitos)
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Campos indexados, en orden de relevancia
+SEARCH_FIELDS = ("nick", "stats", "analisis")
+
+# Rango de cada coincidencia: nick exacto > nick por prefijo > nick contiene > stats > análisis
+RANK_NICK_EXACT, RANK_NICK_PREFIX, RANK_NICK, RANK_STATS, RANK_ANALYSIS = range(5)
+
+search_lock = threading.RLock()
+
+# id -> textos en minúsculas (nick, stats, análisis) usados para verificar coincidencias
+entry_texts = {}
+
+# Índice invertido por campo: palabra -> ids de entradas (array compacto, sólo se añade)
+postings = {field: {} for field in SEARCH_FIELDS}
+
+# Trigramas del vocabulario de cada campo: trigrama -> palabras que lo contienen
+vocab_trigrams = {field: {} for field in SEARCH_FIELDS}
+
+# Apariciones que quedaron obsoletas al actualizar o borrar entradas
+stale_postings = 0
+
+def _trigrams(text):
+    """Devuelve el conjunto de trigramas de un texto"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _tokens(field, text):
+    """Palabras indexadas de un campo; el nick completo es una sola palabra"""
+    if field == "nick":
+        return {text} if text else set()
+    return set(TOKEN_PATTERN.findall(text))
+
+def _entry_texts(entry):
+    """Textos en minúsculas de los campos buscables de una entrada"""
+    return tuple((entry.get(field) or "").lower() for field in SEARCH_FIELDS)
+
+def _add_postings(entry_id, texts):
+    """Añade las palabras de una entrada al índice (llamar con search_lock)"""
+    for field, text in zip(SEARCH_FIELDS, texts):
+        field_postings = postings[field]
+        for token in _tokens(field, text):
+            ids = field_postings.get(token)
+            if ids is None:
+                ids = field_postings[token] = array("q")
+                # Palabra nueva: indexar sus trigramas para búsquedas por subcadena
+                for trigram in _trigrams(token):
+                    vocab_trigrams[field].setdefault(trigram, set()).add(token)
+            ids.append(entry_id)
+
+def _rebuild():
+    """Reconstruye el índice desde los textos vigentes (llamar con search_lock)"""
+    global stale_postings
+
+    for field in SEARCH_FIELDS:
+        postings[field].clear()
+        vocab_trigrams[field].clear()
+    for entry_id in sorted(entry_texts):
+        _add_postings(entry_id, entry_texts[entry_id])
+    stale_postings = 0
+
+def _maybe_compact():
+    """Reconstruye el índice cuando acumula demasiadas apariciones obsoletas"""
+    if stale_postings > max(1000, len(entry_texts)):
+        _rebuild()
+
+def rebuild_index(entries):
+    """Indexa desde cero un diccionario id -> entrada del historial"""
+    with search_lock:
+        entry_texts.clear()
+        for entry_id, entry in entries.items():
+            entry_texts[entry_id] = _entry_texts(entry)
+        _rebuild()
+
+def clear_index():
+    """Vacía el índice de búsqueda"""
+    global stale_postings
+
+    with search_lock:
+        entry_texts.clear()
+        for field in SEARCH_FIELDS:
+            postings[field].clear()
+            vocab_trigrams[field].clear()
+        stale_postings = 0
+
+def index_entry(entry_id, entry):
+    """Añade o actualiza una entrada en el índice"""
+    global stale_postings
+
+    texts = _entry_texts(entry)
+    with search_lock:
+        previous = entry_texts.get(entry_id)
+        if previous == texts:
+            return
+        if previous is not None:
+            # Las apariciones anteriores se descartan al verificar contra el texto nuevo
+            stale_postings += 1
+        entry_texts[entry_id] = texts
+        _add_postings(entry_id, texts)
+        _maybe_compact()
+
+def remove_entry(entry_id):
+    """Quita una entrada del índice"""
+    global stale_postings
+
+    with search_lock:
+        if entry_texts.pop(entry_id, None) is not None:
+            stale_postings += 1
+            _maybe_compact()
+
+def _matching_tokens(field, fragment):
+    """Palabras del vocabulario de un campo que contienen el fragmento"""
+    if len(fragment) < 3:
+        # Consultas cortas: recorrer el vocabulario (mucho menor que el historial)
+        return [token for token in postings[field] if fragment in token]
+
+    # Partir del trigrama menos frecuente y verificar por subcadena
+    candidates = None
+    for trigram in _trigrams(fragment):
+        tokens = vocab_trigrams[field].get(trigram)
+        if not tokens:
+            return []
+        if candidates is None or len(tokens) < len(candidates):
+            candidates = tokens
+    return [token for token in candidates if fragment in token]
+
+def _candidate_ids(field, query):
+    """Ids que pueden contener la consulta en un campo, o None si hay que revisar todas"""
+    if field == "nick":
+        fragments = [query]
+    else:
+        fragments = TOKEN_PATTERN.findall(query)
+        if not fragments:
+            return None
+
+    # Basta con la palabra más selectiva: el resto se comprueba al verificar
+    best = None
+    for fragment in fragments:
+        ids = set()
+        for token in _matching_tokens(field, fragment):
+            ids.update(postings[field][token])
+        if best is None or len(ids) < len(best):
+            best = ids
+        if not best:
+            break
+    return best
+
+def search_history(query):
+    """Devuelve los ids que contienen la consulta, ordenados por relevancia y después por recencia"""
+    query = query.lower()
+    if not query:
+        return []
+
+    with search_lock:
+        ranks = {}
+        for field_position, field in enumerate(SEARCH_FIELDS):
+            ids = _candidate_ids(field, query)
+            for entry_id in (entry_texts.keys() if ids is None else ids):
+                if entry_id in ranks:
+                    # Ya coincidió en un campo más relevante
+                    continue
+                texts = entry_texts.get(entry_id)
+                if texts is None or query not in texts[field_position]:
+                    continue
+
+                if field == "nick":
+                    nick = texts[0]
+                    rank = (RANK_NICK_EXACT if nick == query else
+                            RANK_NICK_PREFIX if nick.startswith(query) else RANK_NICK)
+                else:
+                    rank = RANK_STATS if field == "stats" else RANK_ANALYSIS
+                ranks[entry_id] = rank
+
+    return sorted(ranks, key=lambda entry_id: (ranks[entry_id], -entry_id))
+
+def get_search_index_stats():
+    """Devuelve el tamaño del índice de búsqueda"""
+    with search_lock:
+        return {
+            "entradas": len(entry_texts),
+            "palabras": sum(len(field_postings) for field_postings in postings.values()),
+            "apariciones": sum(len(ids) for field_postings in postings.values() for ids in field_postings.values()),
+            "obsoletas": stale_postings
+        }
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils.logger import log_message
+from src.utils.image_utils import hamming_distance
+
+# Caché global hash perceptual del recorte -> nick reconocido (orden LRU)
+nick_entries = OrderedDict()
+cache_lock = threading.Lock()
+cache_settings = {
+    "max_size": 512,
+    "tolerance": 4  # bits distintos permitidos; nicks distintos del corpus están a 13 bits o más
+}
+cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def load_nick_cache_settings(config):
+    """Actualiza tamaño y tolerancia de la caché de nicks desde la configuración"""
+    cache_settings["max_size"] = max(1, int(config.get("nick_cache_max", 512)))
+    cache_settings["tolerance"] = max(0, int(config.get("nick_cache_tolerancia", 4)))
+
+def hash_key(img_hash):
+    """Normaliza el hash de imagen a entero para compararlo por distancia de Hamming"""
+    if isinstance(img_hash, (bytes, bytearray)):
+        return int.from_bytes(img_hash, "big")
+    return int(img_hash)
+
+def lookup_nick(img_hash):
+    """Busca el nick de un recorte ya reconocido antes, en cualquier mesa"""
+    key = hash_key(img_hash)
+
+    with cache_lock:
+        entry = nick_entries.get(key)
+        best_key = key if entry else None
+
+        # Sin coincidencia exacta: sólo se acepta si todos los hashes dentro de la tolerancia
+        # son del mismo nick; nunca se elige el vecino más cercano entre nicks distintos
+        if entry is None and cache_settings["tolerance"] > 0:
+            candidates = [
+                candidate_key for candidate_key in nick_entries
+                if hamming_distance(key, candidate_key) <= cache_settings["tolerance"]
+            ]
+            if candidates and len({nick_entries[candidate_key]["nick"] for candidate_key in candidates}) == 1:
+                best_key = candidates[-1]
+                entry = nick_entries[best_key]
+
+        if entry is None:
+            cache_stats["misses"] += 1
+            return None
+
+        nick_entries.move_to_end(best_key)
+        entry["hits"] += 1
+        cache_stats["hits"] += 1
+        return entry["nick"]
+
+def store_nick(img_hash, nick):
+    """Guarda el nick reconocido para un recorte, expulsando el menos usado si la caché está llena"""
+    key = hash_key(img_hash)
+
+    with cache_lock:
+        nick_entries[key] = {"nick": nick, "timestamp": time.time(), "hits": 0}
+        nick_entries.move_to_end(key)
+        while len(nick_entries) > cache_settings["max_size"]:
+            nick_entries.popitem(last=False)
+            cache_stats["evictions"] += 1
+
+def forget_nick(img_hash):
+    """Elimina un recorte y sus vecinos de la caché (p. ej. si el nick leído no existe en la API)"""
+    key = hash_key(img_hash)
+
+    with cache_lock:
+        stale_keys = [
+            candidate_key for candidate_key in nick_entries
+            if hamming_distance(key, candidate_key) <= cache_settings["tolerance"]
+        ]
+        for candidate_key in stale_keys:
+            del nick_entries[candidate_key]
+
+def clear_nick_cache():
+    """Vacía la caché de nicks y reinicia los contadores"""
+    with cache_lock:
+        nick_entries.clear()
+        for counter in cache_stats:
+            cache_stats[counter] = 0
+    log_message("Caché de nicks por imagen limpiada")
+
+def get_nick_cache_stats():
+    """Devuelve tamaño, aciertos, fallos y tasa de acierto de la caché de nicks"""
+    with cache_lock:
+        total = cache_stats["hits"] + cache_stats["misses"]
+        return {
+            "entradas": len(nick_entries),
+            "aciertos": cache_stats["hits"],
+            "fallos": cache_stats["misses"],
+            "expulsiones": cache_stats["evictions"],
+            "tasa_acierto": cache_stats["hits"] / total if total else 0.0
+        }
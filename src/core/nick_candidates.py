@@ -0,0 +1,140 @@
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from src.utils.logger import log_message
+from src.core.api_client import fetch_player_stats, PlayerNotFoundError
+
+# Caracteres que el OCR confunde con frecuencia en los nicks (leído -> probable)
+OCR_CONFUSIONS = [
+    ("0", "O"), ("O", "0"),
+    ("1", "l"), ("l", "1"),
+    ("I", "l"), ("l", "I"),
+    ("5", "S"), ("S", "5"),
+    ("8", "B"), ("B", "8")
+]
+
+candidate_settings = {
+    "max_candidates": 8,
+    "timeout": 8.0  # presupuesto total de la búsqueda en segundos
+}
+
+# Variante que resolvió cada nick leído: (sala, nick leído) -> nick real
+matched_aliases = {}
+aliases_lock = threading.Lock()
+search_executor = None
+
+def load_candidate_settings(config):
+    """Actualiza el número de variantes y el presupuesto de tiempo de la búsqueda"""
+    global search_executor
+
+    candidate_settings["max_candidates"] = max(1, int(config.get("nick_variantes_max", 8)))
+    candidate_settings["timeout"] = float(config.get("nick_busqueda_timeout", 8))
+
+    with aliases_lock:
+        if search_executor is not None:
+            search_executor.shutdown(wait=False)
+            search_executor = None
+
+def _get_search_executor():
+    """Devuelve el executor compartido para consultar variantes, creándolo la primera vez"""
+    global search_executor
+
+    with aliases_lock:
+        if search_executor is None:
+            # Un hilo por variante y margen para varias búsquedas simultáneas
+            search_executor = ThreadPoolExecutor(
+                max_workers=candidate_settings["max_candidates"] * 4,
+                thread_name_prefix="nick-candidates"
+            )
+        return search_executor
+
+def generate_nick_candidates(nick, limit=None):
+    """Genera variantes plausibles de un nick leído por OCR, de más a menos probable"""
+    limit = candidate_settings["max_candidates"] if limit is None else limit
+    candidates = []
+
+    def add(candidate):
+        candidate = candidate.strip()
+        if candidate and candidate not in candidates:
+            candidates.append(candidate)
+
+    add(nick)
+
+    # Caracteres de ancho completo y compatibilidad a su forma normal
+    normalized = unicodedata.normalize("NFKC", nick).strip()
+    add(normalized)
+
+    # Fragmentos: el OCR suele añadir texto pegado al nick separado por espacios
+    parts = normalized.split()
+    if len(parts) > 1:
+        add(parts[0])
+        add("".join(parts))
+        add(max(parts, key=len))
+
+    # Confusiones típicas del OCR, primero sobre el fragmento principal y luego sobre el nick completo
+    bases = [parts[0], normalized] if len(parts) > 1 else [normalized]
+    for base in bases:
+        for wrong, right in OCR_CONFUSIONS:
+            if wrong in base:
+                add(base.replace(wrong, right))
+
+    return candidates[:limit]
+
+def get_matched_alias(nick, sala):
+    """Devuelve el nick real que resolvió antes este nick leído, si existe"""
+    with aliases_lock:
+        return matched_aliases.get((sala, nick))
+
+def search_player_stats(nick, sala, token, server_url):
+    """Consulta el nick leído y, si no existe, sus variantes en paralelo (primera coincidencia por prioridad)"""
+    # Una variante que ya funcionó antes se consulta sola
+    alias = get_matched_alias(nick, sala)
+    if alias:
+        try:
+            return fetch_player_stats(alias, sala, token, server_url)
+        except PlayerNotFoundError:
+            with aliases_lock:
+                matched_aliases.pop((sala, nick), None)
+
+    # Lo habitual es que el OCR lea bien el nick: una sola consulta, sin variantes
+    try:
+        return fetch_player_stats(nick, sala, token, server_url)
+    except PlayerNotFoundError:
+        candidates = [candidate for candidate in generate_nick_candidates(nick) if candidate != nick]
+        if not candidates:
+            raise
+
+    executor = _get_search_executor()
+    futures = [
+        (candidate, executor.submit(fetch_player_stats, candidate, sala, token, server_url))
+        for candidate in candidates
+    ]
+
+    deadline = time.monotonic() + candidate_settings["timeout"]
+    first_error = None
+
+    try:
+        for candidate, future in futures:
+            try:
+                data = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except PlayerNotFoundError:
+                continue
+            except FutureTimeoutError:
+                raise Exception(f"Tiempo agotado buscando variantes de '{nick}'")
+            except Exception as e:
+                first_error = first_error or e
+                continue
+
+            with aliases_lock:
+                matched_aliases[(sala, nick)] = candidate
+            log_message(f"Nick '{nick}' resuelto como '{candidate}'")
+            return data
+    finally:
+        for _, future in futures:
+            future.cancel()
+
+    if first_error is not None:
+        raise first_error
+    raise PlayerNotFoundError(f"Jugador no encontrado: {nick} ({len(candidates) + 1} variantes probadas)")
@@ -1,35 +1,141 @@
 import os
 import time
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from PIL import Image, ImageDraw
-from paddleocr import PaddleOCR
-import win32gui
-import win32api
-import win32con
-import win32ui
 from src.utils.logger import log_message  # Añadir esta importación
+from src.core.capture import capture_region, capture_regions, supports_input
+from src.utils.tracing import span
+from src.utils import metrics
+from src.utils.capture_archiver import archive_capture, annotate_capture
+from src.core import tesseract_engine
 
 # Variables globales para OCR
 ocr = None
 ocr_initialized = False
+ocr_lock = threading.Lock()  # PaddleOCR no es thread-safe en modo local
+ocr_pool_activo = False
+ocr_settings = {
+    "use_gpu": True,
+    "max_batch": 8,
+    "rec_batch_num": 8,
+    "modo_rapido": True,  # reconocimiento directo del recorte, sin detección ni clasificación
+    "umbral_confianza": 0.85
+}
+
+def load_ocr_settings(config):
+    """Actualiza los ajustes OCR a partir de la configuración"""
+    ocr_settings["use_gpu"] = bool(config.get("ocr_gpu", True))
+    ocr_settings["max_batch"] = int(config.get("ocr_lote_max", 8))
+    ocr_settings["rec_batch_num"] = int(config.get("ocr_rec_batch", 8))
+    ocr_settings["modo_rapido"] = bool(config.get("ocr_modo_rapido", True))
+    ocr_settings["umbral_confianza"] = float(config.get("ocr_umbral_confianza", 0.85))
+    return ocr_settings
+
+def create_ocr_engine(use_gpu=True, rec_batch_num=8):
+    """Crea una instancia de PaddleOCR configurada para lectura de nicks"""
+    from paddleocr import PaddleOCR
+    return PaddleOCR(
+        use_angle_cls=True,
+        lang='ch',
+        det_db_thresh=0.3,
+        show_log=False,
+        rec_batch_num=rec_batch_num,
+        use_gpu=use_gpu
+    )
+
+def run_ocr(engine, img_np):
+    """Ejecuta PaddleOCR sobre una imagen y devuelve una lista de (texto, confianza)"""
+    detected_texts = []
+    result = engine.ocr(img_np, cls=True)
+    if result and result[0]:
+        for line in result:
+            for word in line:
+                text = word[1][0].strip()
+                confidence = float(word[1][1])
+                if text:
+                    detected_texts.append((text, confidence))
+    return detected_texts
+
+def run_ocr_recognition(engine, images):
+    """Reconoce recortes de una sola línea directamente, sin detección ni clasificación de ángulo"""
+    # engine.ocr(lista, det=False) llama al reconocedor imagen a imagen: se le pasa el lote
+    # completo para que rec_batch_num agrupe los recortes en una sola inferencia
+    crops = [np.stack([img] * 3, axis=-1) if img.ndim == 2 else img for img in images]
+    recognized, _ = engine.text_recognizer(crops)
+    recognized = list(recognized or [])
+    recognized += [("", 0.0)] * (len(crops) - len(recognized))
+    return [(text.strip(), float(confidence)) for text, confidence in recognized]
+
+def run_ocr_task(engine, kind, payload):
+    """Ejecuta una petición OCR sobre un motor concreto (local o worker)"""
+    images = [payload] if kind == "ocr" else list(payload)
+    if kind not in ("ocr", "batch"):
+        raise ValueError(f"Tipo de petición OCR desconocido: {kind}")
+
+    results = [None] * len(images)
+
+    # Ruta rápida: el recuadro del nick ya es una línea de texto, basta con el reconocedor
+    if ocr_settings["modo_rapido"]:
+        for index, (text, confidence) in enumerate(run_ocr_recognition(engine, images)):
+            if text and confidence >= ocr_settings["umbral_confianza"]:
+                results[index] = [(text, confidence)]
+
+    # Pipeline completo sólo para las capturas que no superaron el umbral
+    pending = [index for index, result in enumerate(results) if result is None]
+    if pending:
+        if kind == "ocr":
+            results[0] = run_ocr(engine, images[0])
+        else:
+            for index, detected in zip(pending, run_ocr_mosaic(engine, [images[i] for i in pending])):
+                results[index] = detected
+
+    return results[0] if kind == "ocr" else results
 
 def initialize_ocr(config):
-    global ocr, ocr_initialized
+    global ocr, ocr_initialized, ocr_pool_activo
     try:
-        ocr = PaddleOCR(
-            use_angle_cls=True,
-            lang='ch',
-            det_db_thresh=0.3,
-            show_log=False,
-            rec_batch_num=1,
-            use_gpu=True
-        )
+        load_ocr_settings(config)
+
+        # El respaldo Tesseract se carga una vez y queda residente
+        tesseract_engine.load_tesseract_settings(config)
+        tesseract_engine.preload_tesseract()
+
+        # Con ocr_workers > 0 cada worker carga su propio modelo en un proceso aparte
+        if int(config.get("ocr_workers", 0)) > 0:
+            from src.core.ocr_pool import start_ocr_pool
+            if start_ocr_pool(config):
+                ocr_pool_activo = True
+                ocr_initialized = True
+                return True
+            log_message("No se pudo iniciar el pool OCR, usando motor local", level='warning')
+
+        ocr = create_ocr_engine(ocr_settings["use_gpu"], ocr_settings["rec_batch_num"])
         create_and_test_ocr_sample()
         return True
     except Exception as e:
         print(f"Error al inicializar OCR: {e}")
         return False
 
+def shutdown_ocr():
+    """Libera los recursos del motor OCR"""
+    global ocr_pool_activo
+    tesseract_engine.shutdown_tesseract()
+    if ocr_pool_activo:
+        from src.core.ocr_pool import stop_ocr_pool
+        stop_ocr_pool()
+        ocr_pool_activo = False
+
+def execute_ocr(kind, payload):
+    """Envía una petición OCR al pool de workers o al motor local protegido por lock"""
+    if ocr_pool_activo:
+        from src.core.ocr_pool import submit_ocr_task
+        return submit_ocr_task(kind, payload)
+    with ocr_lock:
+        return run_ocr_task(ocr, kind, payload)
+
 def create_and_test_ocr_sample():
     global ocr_initialized
     try:
@@ -39,7 +145,8 @@ def create_and_test_ocr_sample():
         test_img_path = "capturas/test_ocr.png"
         img.save(test_img_path)
         img_np = np.array(img)
-        result = ocr.ocr(img_np, cls=True)
+        with ocr_lock:
+            result = ocr.ocr(img_np, cls=True)
         ocr_initialized = True
         log_message("OCR pre-inicializado correctamente con prueba de caracteres asiáticos")
         return True
@@ -48,91 +155,161 @@ def create_and_test_ocr_sample():
         return False
 
 def capture_window_region(hwnd, region):
-    """Captura una región de una ventana usando GDI y la devuelve como PIL Image"""
-    x, y, w, h = region
-    hwndDC = win32gui.GetWindowDC(hwnd)
-    mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-    saveDC = mfcDC.CreateCompatibleDC()
-    saveBitMap = win32ui.CreateBitmap()
-    saveBitMap.CreateCompatibleBitmap(mfcDC, w, h)
-    saveDC.SelectObject(saveBitMap)
-    saveDC.BitBlt((0, 0), (w, h), mfcDC, (x, y), win32con.SRCCOPY)
-
-    bmpinfo = saveBitMap.GetInfo()
-    bmpstr = saveBitMap.GetBitmapBits(True)
-    img = Image.frombuffer(
-        'RGB',
-        (bmpinfo['bmWidth'], bmpinfo['bmHeight']),
-        bmpstr, 'raw', 'BGRX', 0, 1
-    )
+    """Captura una región de una ventana con el backend configurado y la devuelve como PIL Image"""
+    return capture_region(hwnd, region)
+
+def capture_nick_image(hwnd, coords):
+    """Hace clic en la zona del nick y captura la región como PIL Image"""
+    region = (coords["x"], coords["y"], coords["w"], coords["h"])
 
-    win32gui.DeleteObject(saveBitMap.GetHandle())
-    saveDC.DeleteDC()
-    mfcDC.DeleteDC()
-    win32gui.ReleaseDC(hwnd, hwndDC)
+    # Clic en la zona del nick (el backend replay no tiene ventana real)
+    if supports_input():
+        from src.utils.windows import click_on_window_point
+        with span("clic"):
+            click_on_window_point(hwnd, coords["x"] + 10, coords["y"] + 10)
+            time.sleep(0.1)
+
+    with span("captura"):
+        img = capture_window_region(hwnd, region)
+
+    # Copia de depuración muestreada: se escribe en segundo plano, fuera del camino crítico
+    archive_capture(img, hwnd=hwnd, region=list(region))
 
     return img
 
-def capture_and_read_nick(hwnd, coords, retry=True):
+def capture_seat_images(hwnd, seats):
+    """Captura la mesa una sola vez y recorta en memoria el nick de cada asiento"""
+    regions = [(seat["x"], seat["y"], seat["w"], seat["h"]) for seat in seats]
+    with span("captura", asientos=len(seats)):
+        images = capture_regions(hwnd, regions)
+
+    for index, (img, region) in enumerate(zip(images, regions)):
+        archive_capture(img, hwnd=hwnd, region=list(region), asiento=index + 1)
+    return images
+
+def read_with_tesseract(img):
+    """Lectura de respaldo con Tesseract cuando PaddleOCR no devuelve nada"""
+    detected_texts = []
     try:
-        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-        region = (coords["x"], coords["y"], coords["w"], coords["h"])
-        abs_region = (left + region[0], top + region[1], region[2], region[3])
-
-        # Clic en la zona del nick
-        x_click = abs_region[0] + 10
-        y_click = abs_region[1] + 10
-        win32api.SendMessage(hwnd, win32con.WM_LBUTTONDOWN, win32con.MK_LBUTTON, win32api.MAKELONG(x_click - left, y_click - top))
-        time.sleep(0.05)
-        win32api.SendMessage(hwnd, win32con.WM_LBUTTONUP, 0, win32api.MAKELONG(x_click - left, y_click - top))
-        time.sleep(0.1)
-
-        # Capturar imagen con método GDI
-        img = capture_window_region(hwnd, region)
-        timestamp = time.strftime("%H%M%S")
-        debug_path = f"capturas/capture_{timestamp}.png"
-        img.save(debug_path)
+        # Motor residente con caché de resultados; pytesseract si tesserocr no está instalado
+        with span("tesseract"):
+            detected_texts = tesseract_engine.read_text(img)
+        for text, confidence in detected_texts:
+            log_message(f"Tesseract detectó: '{text}' (confianza: {confidence:.2f})")
+    except Exception as e:
+        log_message(f"Error en Tesseract: {e}", level='error')
+    return detected_texts
 
-        img_np = np.array(img)
-        detected_texts = []
+def select_nick(detected_texts, engine="paddle"):
+    """Elige el texto con mayor confianza como nick final y registra la lectura en las métricas"""
+    if not detected_texts:
+        metrics.inc_counter("pokerbot_ocr_lecturas_total", motor=engine, resultado="vacio")
+        return None
+    sorted_texts = sorted(detected_texts, key=lambda x: x[1], reverse=True)
+    metrics.inc_counter("pokerbot_ocr_lecturas_total", motor=engine, resultado="ok")
+    metrics.observe("pokerbot_ocr_confianza", float(sorted_texts[0][1]), motor=engine)
+    return sorted_texts[0][0][:25].strip()
 
-        # 1. PaddleOCR
-        try:
-            result = ocr.ocr(img_np, cls=True)
-            if result and result[0]:
-                for line in result:
-                    for word in line:
-                        text = word[1][0].strip()
-                        confidence = word[1][1]
-                        if text:
-                            detected_texts.append((text, confidence))
-                            log_message(f"PaddleOCR detectó: '{text}' (confianza: {confidence:.2f})")
-        except Exception as e:
-            log_message(f"Error en PaddleOCR: {e}", level='error')
-
-        # 2. Tesseract si falló
+def read_nick_from_image(img):
+    """Lee el nick de una imagen ya capturada (PaddleOCR y Tesseract como respaldo)"""
+    img_np = np.array(img)
+    detected_texts = []
+
+    # 1. PaddleOCR
+    try:
+        for text, confidence in execute_ocr("ocr", img_np):
+            detected_texts.append((text, confidence))
+            log_message(f"PaddleOCR detectó: '{text}' (confianza: {confidence:.2f})")
+    except Exception as e:
+        log_message(f"Error en PaddleOCR: {e}", level='error')
+
+    # 2. Tesseract si falló
+    engine = "paddle"
+    if not detected_texts:
+        detected_texts = read_with_tesseract(img)
+        engine = "tesseract"
+
+    nick = select_nick(detected_texts, engine)
+    annotate_capture(img, nick, detected_texts, engine)
+    return nick
+
+def run_ocr_mosaic(engine, images, padding=16):
+    """Apila varias imágenes en un solo lienzo y las lee con una única llamada de detección/reconocimiento"""
+    width = max(img.shape[1] for img in images)
+    offsets = []
+    y = 0
+    for img in images:
+        offsets.append(y)
+        y += img.shape[0] + padding
+
+    canvas = np.zeros((y, width, 3), dtype=np.uint8)
+    for img, offset in zip(images, offsets):
+        canvas[offset:offset + img.shape[0], :img.shape[1]] = img[:, :, :3]
+
+    results = [[] for _ in images]
+    result = engine.ocr(canvas, cls=True)
+    if result and result[0]:
+        for line in result:
+            for word in line:
+                text = word[1][0].strip()
+                if not text:
+                    continue
+                # Asignar cada caja a la imagen cuyo tramo contiene su centro vertical
+                center_y = sum(point[1] for point in word[0]) / len(word[0])
+                slot = bisect.bisect_right(offsets, center_y) - 1
+                results[max(slot, 0)].append((text, float(word[1][1])))
+    return results
+
+def read_nicks_batch(images):
+    """Lee los nicks de varias capturas con una sola petición OCR por lote"""
+    if not images:
+        return []
+
+    arrays = [np.array(img.convert("RGB")) for img in images]
+    batch_size = max(1, ocr_settings["max_batch"])
+    chunks = [arrays[i:i + batch_size] for i in range(0, len(arrays), batch_size)]
+
+    detected = []
+    try:
+        if len(chunks) == 1:
+            chunk_results = [execute_ocr("batch", chunks[0])]
+        else:
+            # Con el pool de workers cada lote se procesa en paralelo en un proceso distinto
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                chunk_results = list(executor.map(lambda chunk: execute_ocr("batch", chunk), chunks))
+        for chunk_result in chunk_results:
+            detected.extend(chunk_result)
+    except Exception as e:
+        log_message(f"Error en OCR por lotes: {e}", level='error')
+        detected = [[] for _ in images]
+
+    nicks = []
+    for img, detected_texts in zip(images, detected):
+        engine = "paddle"
         if not detected_texts:
-            try:
-                import pytesseract
-                custom_config = r'--oem 3 --psm 7 -l chi_sim+jpn+kor+eng'
-                texto = pytesseract.image_to_string(img, config=custom_config)
-                if texto.strip():
-                    detected_texts.append((texto.strip(), 0.8))
-                    log_message(f"Tesseract detectó: '{texto.strip()}'")
-            except Exception as e:
-                log_message(f"Error en Tesseract: {e}", level='error')
-
-        # 3. Segundo intento si aún no hay resultados
-        if not detected_texts and retry:
+            detected_texts = read_with_tesseract(img)
+            engine = "tesseract"
+        nick = select_nick(detected_texts, engine)
+        annotate_capture(img, nick, detected_texts, engine)
+        nicks.append(nick)
+
+    log_message(f"OCR por lotes: {sum(1 for n in nicks if n)}/{len(images)} nicks leídos")
+    return nicks
+
+def capture_and_read_nick(hwnd, coords, retry=True):
+    try:
+        img = capture_nick_image(hwnd, coords)
+        final_nick = read_nick_from_image(img)
+
+        # Segundo intento si aún no hay resultados
+        if not final_nick and retry and supports_input():
             log_message("Realizando segundo intento con nuevo clic")
             from src.utils.windows import click_on_window_point
             click_on_window_point(hwnd, coords["x"] + 10, coords["y"] + 10)
             time.sleep(0.2)
             return capture_and_read_nick(hwnd, coords, retry=False)
 
-        if detected_texts:
-            sorted_texts = sorted(detected_texts, key=lambda x: x[1], reverse=True)
-            final_nick = sorted_texts[0][0][:25].strip()
+        if final_nick:
             log_message(f"Nick final: '{final_nick}'")
             return final_nick
         else:
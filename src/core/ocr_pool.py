@@ -0,0 +1,271 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from src.utils.logger import log_message
+
+# Los workers se crean con "spawn" para que cada proceso tenga su propio modelo PaddleOCR
+_ctx = multiprocessing.get_context("spawn")
+
+# Estado global del pool OCR
+pool_processes = {}
+task_queue = None
+result_queue = None
+pending_requests = {}
+pending_lock = threading.Lock()
+request_ids = itertools.count(1)
+dispatcher_thread = None
+pool_running = False
+pool_settings = {
+    "workers": 2,
+    "queue_size": 16,
+    "timeout": 10.0,
+    "queue_timeout": 2.0,
+    "max_failures": 5  # arranques fallidos seguidos antes de abandonar un worker
+}
+
+# Arranques seguidos sin llegar a "ready" y próximo relanzamiento permitido por worker
+worker_failures = {}
+worker_retry_at = {}
+
+# Peticiones que expiraron pero siguen en la cola: cuentan para el back-pressure hasta que
+# el worker las descarta (request_id -> instante de expiración)
+expired_requests = {}
+
+def _ocr_worker(worker_id, tasks, results, settings):
+    """Bucle de un proceso worker: carga PaddleOCR una vez y atiende peticiones de la cola"""
+    import numpy as np
+    from src.core.ocr_engine import create_ocr_engine, run_ocr_task, ocr_settings
+
+    # Los globales no se comparten con spawn: el worker recibe los ajustes del proceso principal
+    ocr_settings.update(settings)
+
+    try:
+        engine = create_ocr_engine(settings["use_gpu"], settings["rec_batch_num"])
+        # Pre-calentar el modelo para que la primera lectura real no pague la inicialización
+        engine.ocr(np.zeros((32, 120, 3), dtype=np.uint8), cls=True)
+        results.put(("ready", worker_id, None))
+    except Exception as e:
+        results.put(("failed", worker_id, str(e)))
+        return
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        request_id, kind, payload, deadline = task
+        # Quien la pidió ya dejó de esperar: no gastar el worker en ella
+        if time.time() > deadline:
+            results.put((request_id, False, "expirada"))
+            continue
+        try:
+            results.put((request_id, True, run_ocr_task(engine, kind, payload)))
+        except Exception as e:
+            results.put((request_id, False, str(e)))
+
+def _spawn_worker(worker_id):
+    """Lanza un proceso worker OCR"""
+    from src.core.ocr_engine import ocr_settings
+
+    process = _ctx.Process(
+        target=_ocr_worker,
+        args=(worker_id, task_queue, result_queue, dict(ocr_settings)),
+        name=f"ocr-worker-{worker_id}",
+        daemon=True
+    )
+    process.start()
+    pool_processes[worker_id] = process
+    return process
+
+def _check_workers():
+    """Relanza con espera creciente los workers caídos; abandona los que nunca llegan a iniciar"""
+    global pool_running
+
+    now = time.monotonic()
+    for worker_id, process in list(pool_processes.items()):
+        if process.is_alive() or not pool_running:
+            continue
+
+        failures = worker_failures.get(worker_id, 0)
+        if failures >= pool_settings["max_failures"]:
+            log_message(f"Worker OCR {worker_id} falló {failures} veces al iniciar, no se relanza", level='error')
+            del pool_processes[worker_id]
+            continue
+        if now < worker_retry_at.get(worker_id, 0):
+            continue
+
+        log_message(f"Worker OCR {worker_id} terminó (código {process.exitcode}), relanzando", level='warning')
+        worker_failures[worker_id] = failures + 1
+        worker_retry_at[worker_id] = now + min(60, 2 ** failures)
+        _spawn_worker(worker_id)
+
+    # Las expiradas que ningún worker descartó (p. ej. murió con ellas) dejan de contar
+    with pending_lock:
+        for request_id, expired_at in list(expired_requests.items()):
+            if now - expired_at > 60:
+                del expired_requests[request_id]
+
+    if pool_running and not pool_processes:
+        log_message("Todos los workers OCR fallaron, se detiene el pool", level='error')
+        pool_running = False
+        threading.Thread(target=stop_ocr_pool, name="ocr-pool-stop", daemon=True).start()
+
+def _dispatch_results():
+    """Hilo que reparte los resultados de los workers a las peticiones pendientes"""
+    while pool_running:
+        try:
+            request_id, ok, payload = result_queue.get(timeout=1)
+        except queue.Empty:
+            _check_workers()
+            continue
+        except (EOFError, OSError):
+            break
+
+        if request_id == "ready":
+            # Un worker que llega a cargar el modelo vuelve a tener todos los reintentos
+            worker_failures.pop(ok, None)
+            continue
+        if request_id == "failed":
+            log_message(f"Worker OCR {ok} no pudo iniciar: {payload}", level='error')
+            continue
+
+        with pending_lock:
+            future = pending_requests.pop(request_id, None)
+            expired_requests.pop(request_id, None)
+
+        # La petición pudo haber expirado mientras el worker la procesaba
+        if future is None or future.done():
+            continue
+
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(f"Error en worker OCR: {payload}"))
+
+def start_ocr_pool(config):
+    """Inicia N workers OCR pre-calentados según la configuración"""
+    global task_queue, result_queue, dispatcher_thread, pool_running
+
+    if pool_running:
+        return True
+
+    pool_settings["workers"] = max(1, int(config.get("ocr_workers", 2)))
+    pool_settings["queue_size"] = max(1, int(config.get("ocr_cola_max", 16)))
+    pool_settings["timeout"] = float(config.get("ocr_timeout", 10))
+    pool_settings["queue_timeout"] = float(config.get("ocr_cola_timeout", 2))
+    worker_failures.clear()
+    worker_retry_at.clear()
+
+    try:
+        task_queue = _ctx.Queue(maxsize=pool_settings["queue_size"])
+        result_queue = _ctx.Queue()
+
+        for worker_id in range(pool_settings["workers"]):
+            _spawn_worker(worker_id)
+
+        # Esperar a que todos los workers tengan el modelo cargado
+        ready = 0
+        deadline = time.monotonic() + float(config.get("ocr_timeout_inicio", 120))
+        while ready < pool_settings["workers"]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                status, worker_id, error = result_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if status == "ready":
+                ready += 1
+            elif status == "failed":
+                log_message(f"Worker OCR {worker_id} no pudo iniciar: {error}", level='error')
+
+        if ready == 0:
+            log_message("Ningún worker OCR quedó listo", level='error')
+            stop_ocr_pool()
+            return False
+
+        pool_running = True
+        dispatcher_thread = threading.Thread(target=_dispatch_results, name="ocr-dispatcher", daemon=True)
+        dispatcher_thread.start()
+
+        log_message(f"Pool OCR iniciado: {ready}/{pool_settings['workers']} workers listos")
+        return True
+    except Exception as e:
+        log_message(f"Error al iniciar pool OCR: {e}", level='error')
+        stop_ocr_pool()
+        return False
+
+def submit_ocr_task(kind, payload, timeout=None):
+    """Envía una petición al pool y espera el resultado con timeout"""
+    if not pool_running:
+        raise RuntimeError("El pool OCR no está en ejecución")
+
+    timeout = pool_settings["timeout"] if timeout is None else timeout
+    request_id = next(request_ids)
+    future = Future()
+
+    with pending_lock:
+        # Back-pressure: no aceptar más peticiones de las que caben en la cola
+        if len(pending_requests) + len(expired_requests) >= pool_settings["queue_size"]:
+            raise RuntimeError("Pool OCR saturado, petición rechazada")
+        pending_requests[request_id] = future
+
+    try:
+        task_queue.put((request_id, kind, payload, time.time() + timeout), timeout=pool_settings["queue_timeout"])
+    except queue.Full:
+        with pending_lock:
+            pending_requests.pop(request_id, None)
+        raise RuntimeError("Cola OCR llena, petición rechazada")
+
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        with pending_lock:
+            pending_requests.pop(request_id, None)
+            expired_requests[request_id] = time.monotonic()
+        raise TimeoutError(f"Timeout de OCR tras {timeout:.1f}s")
+
+def get_ocr_pool_status():
+    """Devuelve el estado actual del pool OCR"""
+    with pending_lock:
+        pending = len(pending_requests)
+        expired = len(expired_requests)
+    return {
+        "activo": pool_running,
+        "workers": sum(1 for p in pool_processes.values() if p.is_alive()),
+        "pendientes": pending,
+        "expiradas": expired
+    }
+
+def stop_ocr_pool():
+    """Detiene los workers OCR y libera las colas"""
+    global pool_running, task_queue, result_queue
+
+    pool_running = False
+
+    for _ in pool_processes:
+        try:
+            task_queue.put_nowait(None)
+        except Exception:
+            pass
+
+    for worker_id, process in list(pool_processes.items()):
+        process.join(timeout=2)
+        if process.is_alive():
+            process.terminate()
+    pool_processes.clear()
+
+    with pending_lock:
+        for future in pending_requests.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Pool OCR detenido"))
+        pending_requests.clear()
+        expired_requests.clear()
+
+    task_queue = None
+    result_queue = None
+    log_message("Pool OCR detenido")
@@ -1,25 +1,81 @@
 import time
 import threading
 import pyperclip
-import win32gui
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
 
 from src.utils.logger import log_message
 from src.utils.windows import focus_window, get_window_under_cursor
-from src.core.ocr_engine import capture_and_read_nick, capture_window_region
-from src.core.api_client import get_player_stats
+from src.core.ocr_engine import capture_nick_image, capture_seat_images, read_nick_from_image, read_nicks_batch
+from src.core.capture import supports_input, load_capture_settings, prune_capture_contexts
+from src.core.stats_cache import get_cached_stats, get_stats_cache_stats
 from src.core.gpt_client import analyze_stats
-from src.core.history_manager import add_to_history, load_history, find_existing_analysis
-from src.utils.image_utils import generate_image_hash
+from src.core.history_manager import add_to_history, get_last_history_entry, find_existing_analysis
+from src.core import nick_cache, analysis_cache
+from src.utils import tracing, metrics
+from src.utils.tracing import span
+from src.utils.image_utils import generate_image_hash, hamming_distance
 
-# Caché de nicks y hashes
-nick_cache = {}
+# Último nick y hash leídos por ventana (para invalidar la caché si la API falla)
 last_nick_data = {}
 
+# Pegar en mesa usa portapapeles y foco globales: sólo un análisis puede pegar a la vez
+paste_lock = threading.Lock()
+
+# Hash del último recorte analizado por ventana: el barrido omite las mesas sin cambios
+table_hashes = {}
+sweep_settings = {
+    "detect_changes": True,
+    "change_threshold": 8  # bits distintos tolerados entre capturas del mismo nick
+}
+sweep_stats = {"sweeps": 0, "short_circuited": 0, "tables_skipped": 0, "tables_analyzed": 0}
+sweep_lock = threading.Lock()
+
+# Análisis GPT en segundo plano (segunda fase del pipeline)
+analysis_executor = None
+analysis_lock = threading.Lock()
+pending_analyses = set()
+
+def collect_cache_metrics():
+    """Aciertos, fallos y tamaño de las cachés de nicks, stats y análisis para el endpoint de métricas"""
+    samples = []
+    caches = [
+        ("nicks", nick_cache.get_nick_cache_stats()),
+        ("stats", get_stats_cache_stats()),
+        ("analisis", analysis_cache.get_analysis_cache_stats())
+    ]
+    for name, stats in caches:
+        hits = stats["aciertos"] + stats.get("aciertos_caducados", 0)
+        samples.append(("pokerbot_cache_aciertos_total", "counter", "Consultas resueltas por cada caché", {"cache": name}, hits))
+        samples.append(("pokerbot_cache_fallos_total", "counter", "Consultas que cada caché no pudo resolver", {"cache": name}, stats["fallos"]))
+        samples.append(("pokerbot_cache_entradas", "gauge", "Entradas guardadas en cada caché", {"cache": name}, stats["entradas"]))
+    # Agrupar por nombre: el formato de texto exige las series de una métrica juntas
+    return sorted(samples, key=lambda sample: sample[0])
+
+metrics.register_collector(collect_cache_metrics)
+
+def load_sweep_settings(config):
+    """Actualiza la detección de cambios del barrido automático desde la configuración"""
+    sweep_settings["detect_changes"] = bool(config.get("auto_detectar_cambios", True))
+    sweep_settings["change_threshold"] = max(0, int(config.get("auto_umbral_cambio", 8)))
+
+def get_sweep_stats():
+    """Devuelve barridos, barridos sin cambios y mesas omitidas o analizadas"""
+    with sweep_lock:
+        return {
+            "barridos": sweep_stats["sweeps"],
+            "barridos_sin_cambios": sweep_stats["short_circuited"],
+            "mesas_omitidas": sweep_stats["tables_skipped"],
+            "mesas_analizadas": sweep_stats["tables_analyzed"]
+        }
+
 def clear_nick_cache():
-    global nick_cache, last_nick_data
-    nick_cache = {}
+    global last_nick_data
+    nick_cache.clear_nick_cache()
     last_nick_data = {}
+    # Sin hashes previos el siguiente barrido vuelve a analizar todas las mesas
+    with sweep_lock:
+        table_hashes.clear()
     log_message("Caché de nicks limpiada")
     return True
 
@@ -78,8 +134,9 @@ def format_stats_summary(data, config):
         return "Error al formatear stats"
 
 def analyze_table(hwnd, config, manual_nick=None, force_new_capture=False):
-    global nick_cache, last_nick_data
-
+    # Una traza por análisis: sus etapas comparten el mismo identificador de correlación
+    trace = tracing.start_trace("analisis", hwnd=hwnd, manual=bool(manual_nick))
+    status = "ok"
     try:
         log_message("Iniciando análisis de mesa")
 
@@ -87,130 +144,447 @@ def analyze_table(hwnd, config, manual_nick=None, force_new_capture=False):
             nick = manual_nick
             log_message(f"Usando nick manual: '{nick}'")
         else:
-            use_cache = not force_new_capture and hwnd in nick_cache and (time.time() - nick_cache[hwnd]["timestamp"]) < 60
-
-            if use_cache:
-                left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-                coords = config["ocr_coords"]
-                img = capture_window_region(hwnd, (coords["x"], coords["y"], coords["w"], coords["h"]))
-                img_hash = generate_image_hash(img)
-
-                if hwnd in last_nick_data and "img_hash" in last_nick_data[hwnd]:
-                    if img_hash != last_nick_data[hwnd]["img_hash"]:
-                        log_message("Detectado cambio de jugador en la misma ventana")
-                        use_cache = False
-
-                if use_cache:
-                    nick = nick_cache[hwnd]["nick"]
-                    log_message(f"Nick recuperado de caché: '{nick}'")
-                else:
-                    log_message("La ventana cambió, obteniendo nuevo nick...")
-
-            if not use_cache:
-                original_hwnd, current_hwnd = focus_window(hwnd)
+            if supports_input():
+                with span("foco"):
+                    original_hwnd, current_hwnd = focus_window(hwnd)
+
+            # Una sola captura: sirve para consultar la caché por imagen y, si falla, para el OCR
+            img = capture_nick_image(hwnd, config["ocr_coords"])
+            img_hash = generate_image_hash(img)
+            nick = None if force_new_capture else nick_cache.lookup_nick(img_hash)
+
+            if nick:
+                log_message(f"Nick recuperado de caché: '{nick}'")
+            else:
                 log_message("Leyendo nick...")
-                nick = capture_and_read_nick(hwnd, config["ocr_coords"])
+                with span("ocr"):
+                    nick = read_nick_from_image(img)
+
+                # Segundo intento si aún no hay resultados
+                if not nick and supports_input():
+                    log_message("Realizando segundo intento con nuevo clic")
+                    time.sleep(0.2)
+                    img = capture_nick_image(hwnd, config["ocr_coords"])
+                    img_hash = generate_image_hash(img)
+                    with span("ocr", intento=2):
+                        nick = read_nick_from_image(img)
 
                 if not nick:
                     log_message("No se detectó ningún nick", level='warning')
+                    status = "sin_nick"
                     return False
 
-                nick_cache[hwnd] = {
-                    "nick": nick,
-                    "timestamp": time.time()
-                }
-
-                left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-                coords = config["ocr_coords"]
-                img = capture_window_region(hwnd, (coords["x"], coords["y"], coords["w"], coords["h"]))
-                img_hash = generate_image_hash(img)
-
-                last_nick_data[hwnd] = {
-                    "nick": nick,
-                    "img_hash": img_hash
-                }
-
+                nick_cache.store_nick(img_hash, nick)
                 log_message(f"Nick detectado: '{nick}'")
 
-        try:
-            stats_data = get_player_stats(nick, config["sala_default"], config["token"], config["server_url"])
-            stats_data["player_name"] = nick
-            stats_summary = format_stats_summary(stats_data, config)
-            
-            # Buscar si ya tenemos un análisis para estos stats exactos
-            existing_analysis = find_existing_analysis(nick, stats_summary, config["sala_default"])
-            
-            if existing_analysis:
-                # Usar análisis existente si está disponible
-                analysis = existing_analysis
-                log_message(f"Usando análisis existente para {nick}")
-            else:
-                # Generar nuevo análisis con GPT solo si es necesario
-                analysis = analyze_stats(stats_data, config["openai_api_key"], nick)
-                log_message(f"Nuevo análisis generado para {nick}")
-
-            log_message(f"Stats: {stats_summary}")
-            log_message(f"Análisis: {analysis[:100]}...")
-
-            show_copy_dialog = config.get("mostrar_dialogo_copia", False)
-
-            if show_copy_dialog:
-                from src.ui.main_window import root
-                if root and root.winfo_exists():
-                    root.after(100, lambda: show_copy_options_dialog(root, stats_summary, analysis, hwnd, config))
-                    log_message("Diálogo de copia programado")
-                else:
-                    paste_results(stats_summary, analysis, hwnd, config)
-            else:
-                paste_results(stats_summary, analysis, hwnd, config)
-
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            history_entry = {
-                "timestamp": timestamp,
+            last_nick_data[hwnd] = {
                 "nick": nick,
-                "stats": stats_summary,
-                "analisis": analysis,
-                "sala": config["sala_default"]
+                "img_hash": img_hash
             }
-            add_to_history(history_entry)
 
-            try:
-                from src.ui.main_window import root, update_history_ui
-                if root and root.winfo_exists():
-                    root.after(100, update_history_ui)
-                    log_message("Actualización de historial UI programada")
-            except Exception as ui_error:
-                log_message(f"Error al programar actualización de UI del historial: {ui_error}", level='warning')
+        if trace is not None:
+            trace["attributes"]["nick"] = nick
+        completed = process_player(hwnd, nick, config)
+        if not completed:
+            status = "error"
+        return completed
 
+    except Exception as e:
+        status = "error"
+        log_message(f"Error en análisis de mesa: {e}", level='error')
+        import traceback
+        log_message(traceback.format_exc(), level='error')
+        return False
+    finally:
+        tracing.end_trace(trace, status)
+
+def get_analysis_executor(config):
+    """Devuelve el executor de análisis GPT, que limita las llamadas simultáneas al LLM"""
+    global analysis_executor
+
+    with analysis_lock:
+        if analysis_executor is None:
+            max_workers = max(1, int(config.get("gpt_max_concurrentes", 2)))
+            analysis_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gpt-analysis")
+        return analysis_executor
+
+def wait_for_pending_analyses(timeout=None):
+    """Espera a que terminen los análisis GPT en curso"""
+    with analysis_lock:
+        futures = list(pending_analyses)
+    done, not_done = wait(futures, timeout=timeout)
+    return len(not_done) == 0
+
+def shutdown_analysis_executor():
+    """Cancela los análisis GPT en cola y libera el executor"""
+    global analysis_executor
+
+    with analysis_lock:
+        executor = analysis_executor
+        analysis_executor = None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def deliver_results(hwnd, nick, stats_summary, analysis, config, stats_pasted=False, paste=True):
+    """Pega o muestra el resultado, lo guarda en el historial y refresca la UI"""
+    show_copy_dialog = config.get("mostrar_dialogo_copia", False)
+
+    # paste=False: lectura de mesa completa, el resultado conjunto ya se pegó y sólo se guarda
+    if paste and show_copy_dialog:
+        from src.ui.main_window import root
+        if root and root.winfo_exists():
+            root.after(100, lambda: show_copy_options_dialog(root, stats_summary, analysis, hwnd, config))
+            log_message("Diálogo de copia programado")
+        else:
+            paste_results(None if stats_pasted else stats_summary, analysis, hwnd, config)
+    elif paste:
+        paste_results(None if stats_pasted else stats_summary, analysis, hwnd, config)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    history_entry = {
+        "timestamp": timestamp,
+        "nick": nick,
+        "stats": stats_summary,
+        "analisis": analysis,
+        "sala": config["sala_default"]
+    }
+    with span("historial"):
+        add_to_history(history_entry)
+    metrics.inc_counter("pokerbot_analisis_total", resultado="ok")
+
+    try:
+        from src.ui.main_window import root, update_history_ui
+        if root and root.winfo_exists():
+            root.after(100, update_history_ui)
+            log_message("Actualización de historial UI programada")
+    except Exception as ui_error:
+        log_message(f"Error al programar actualización de UI del historial: {ui_error}", level='warning')
+
+def complete_analysis(hwnd, nick, stats_data, stats_summary, config, stats_pasted, paste=True):
+    """Segunda fase: genera el análisis GPT y lo entrega cuando está listo"""
+    try:
+        with span("gpt"):
+            analysis = analyze_stats(stats_data, config["openai_api_key"], nick)
+        analysis_cache.store_analysis(nick, config["sala_default"], stats_data, analysis)
+        log_message(f"Nuevo análisis generado para {nick}")
+        log_message(f"Análisis: {analysis[:100]}...")
+
+        deliver_results(hwnd, nick, stats_summary, analysis, config, stats_pasted, paste)
+        log_message("Análisis completado con éxito")
+        return True
+    except Exception as e:
+        tracing.set_trace_status("error")
+        metrics.inc_counter("pokerbot_analisis_total", resultado="error")
+        log_message(f"Error al generar análisis de {nick}: {e}", level='error')
+        import traceback
+        log_message(traceback.format_exc(), level='error')
+        return False
+
+def process_player(hwnd, nick, config):
+    """Obtiene stats de un nick ya leído y los pega al momento; el análisis GPT se entrega después"""
+    try:
+        with span("api"):
+            stats_data = get_cached_stats(nick, config["sala_default"], config["token"], config["server_url"])
+        stats_data["player_name"] = nick
+        stats_summary = format_stats_summary(stats_data, config)
+        log_message(f"Stats: {stats_summary}")
+
+        # Buscar si ya tenemos un análisis para estos stats exactos o para un perfil equivalente
+        with span("buscar_analisis"):
+            existing_analysis = find_existing_analysis(nick, stats_summary, config["sala_default"])
+            if not existing_analysis:
+                existing_analysis = analysis_cache.lookup_analysis(nick, config["sala_default"], stats_data)
+
+        if existing_analysis:
+            # Usar análisis existente: todo está listo, se entrega de una vez
+            log_message(f"Usando análisis existente para {nick}")
+            deliver_results(hwnd, nick, stats_summary, existing_analysis, config)
             log_message("Análisis completado con éxito")
             return True
 
+        # Primera fase: pegar los stats sin esperar al LLM
+        stats_pasted = False
+        if config["mostrar_stats"] and not config.get("mostrar_dialogo_copia", False):
+            stats_pasted = paste_results(stats_summary, None, hwnd, config)
+            log_message(f"Stats pegados para {nick}, análisis en segundo plano")
+
+        # Segunda fase: análisis GPT con concurrencia limitada, dentro de la misma traza
+        submit_analysis(hwnd, nick, stats_data, stats_summary, config, stats_pasted)
+        return True
+
+    except Exception as e:
+        metrics.inc_counter("pokerbot_analisis_total", resultado="error")
+        log_message(f"Error al obtener/analizar stats: {e}", level='error')
+        # El nick pudo leerse mal: no reutilizarlo desde la caché
+        if hwnd in last_nick_data and last_nick_data[hwnd]["nick"] == nick:
+            nick_cache.forget_nick(last_nick_data[hwnd]["img_hash"])
+            del last_nick_data[hwnd]
+        return False
+
+def submit_analysis(hwnd, nick, stats_data, stats_summary, config, stats_pasted, paste=True):
+    """Programa el análisis GPT de un jugador en segundo plano dentro de la traza activa"""
+    trace = tracing.current_trace()
+    tracing.retain_trace(trace)
+    try:
+        future = get_analysis_executor(config).submit(
+            tracing.run_in_trace, trace, complete_analysis, hwnd, nick, stats_data, stats_summary, config, stats_pasted, paste
+        )
+    except Exception:
+        tracing.end_trace(trace, "error")
+        raise
+    with analysis_lock:
+        pending_analyses.add(future)
+
+    def on_done(done_future):
+        with analysis_lock:
+            pending_analyses.discard(done_future)
+
+    future.add_done_callback(on_done)
+    return future
+
+def process_player_traced(hwnd, nick, config, sweep_id=None):
+    """process_player dentro de una traza propia, enlazada al barrido que leyó el nick"""
+    trace = tracing.start_trace("barrido_jugador", hwnd=hwnd, nick=nick, barrido=sweep_id)
+    completed = False
+    try:
+        completed = process_player(hwnd, nick, config)
+        return completed
+    finally:
+        tracing.end_trace(trace, "ok" if completed else "error")
+
+def analyze_tables_batch(tables, config, should_continue=None):
+    """Analiza varias mesas en lote: captura todos los nicks, un solo OCR y consultas en paralelo"""
+    trace = tracing.start_trace("barrido", mesas=len(tables))
+    try:
+        return _analyze_tables_batch(tables, config, should_continue, trace)
+    finally:
+        tracing.end_trace(trace)
+
+def _analyze_tables_batch(tables, config, should_continue, trace):
+    """Captura, OCR por lotes y consultas paralelas del barrido (ver analyze_tables_batch)"""
+    should_continue = should_continue or (lambda: True)
+    coords = config["ocr_coords"]
+
+    # Liberar los DCs y búferes de captura de las mesas que se cerraron
+    prune_capture_contexts({hwnd for hwnd, _ in tables})
+
+    # 1. Capturar la zona del nick de todas las mesas
+    captured = []
+    for hwnd, title in tables:
+        if not should_continue():
+            return 0
+        try:
+            captured.append((hwnd, title, capture_nick_image(hwnd, coords)))
         except Exception as e:
-            log_message(f"Error al obtener/analizar stats: {e}", level='error')
-            if hwnd in nick_cache:
-                del nick_cache[hwnd]
-            if hwnd in last_nick_data:
-                del last_nick_data[hwnd]
+            log_message(f"Error al capturar mesa {title}: {e}", level='error')
+
+    if not captured or not should_continue():
+        return 0
+
+    # 2. Omitir las mesas cuyo recorte no cambió desde el último análisis (mismo rival sentado)
+    hashes = [generate_image_hash(img) for _, _, img in captured]
+    captured, hashes, skipped = _filter_unchanged_tables(tables, captured, hashes)
+    if skipped:
+        log_message(f"Barrido: {skipped} mesas sin cambios omitidas")
+    if not captured:
+        with sweep_lock:
+            sweep_stats["short_circuited"] += 1
+        metrics.inc_counter("pokerbot_barridos_total", resultado="sin_cambios")
+        log_message("Barrido sin cambios: no se analiza ninguna mesa")
+        return 0
+    metrics.inc_counter("pokerbot_barridos_total", resultado="analizado")
+
+    # 3. Resolver desde la caché por imagen y reconocer el resto en un solo lote
+    nicks = [nick_cache.lookup_nick(img_hash) for img_hash in hashes]
+    pending = [index for index, nick in enumerate(nicks) if not nick]
+    if pending:
+        with span("ocr", lote=len(pending)):
+            batch_nicks = read_nicks_batch([captured[i][2] for i in pending])
+        for index, nick in zip(pending, batch_nicks):
+            nicks[index] = nick
+            if nick:
+                nick_cache.store_nick(hashes[index], nick)
+    log_message(f"Barrido: {len(captured) - len(pending)} nicks desde caché, {len(pending)} por OCR")
+
+    players = []
+    for (hwnd, title, img), img_hash, nick in zip(captured, hashes, nicks):
+        if not nick:
+            log_message(f"No se detectó nick en mesa: {title}", level='warning')
+            continue
+        last_nick_data[hwnd] = {"nick": nick, "img_hash": img_hash}
+        players.append((hwnd, nick))
+
+    if not players or not should_continue():
+        return 0
+
+    # 4. Consultar stats y análisis de todos los jugadores en paralelo
+    max_workers = max(1, min(len(players), int(config.get("auto_max_paralelo", 8))))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        sweep_id = trace["id"] if trace else None
+        results = list(executor.map(lambda player: process_player_traced(player[0], player[1], config, sweep_id), players))
+
+    # Sólo se recuerda el recorte de las mesas analizadas con éxito: los fallos se reintentan
+    with sweep_lock:
+        for (hwnd, _), ok in zip(players, results):
+            if ok:
+                table_hashes[hwnd] = last_nick_data.get(hwnd, {}).get("img_hash")
+        sweep_stats["tables_analyzed"] += sum(1 for ok in results if ok)
+
+    completed = sum(1 for ok in results if ok)
+    log_message(f"Barrido por lotes completado: {completed}/{len(tables)} mesas analizadas")
+    return completed
+
+def _filter_unchanged_tables(tables, captured, hashes):
+    """Separa las mesas cuyo recorte cambió; devuelve (capturas, hashes, número de omitidas)"""
+    open_hwnds = {hwnd for hwnd, _ in tables}
+
+    with sweep_lock:
+        sweep_stats["sweeps"] += 1
+        # Olvidar las mesas que ya no están abiertas
+        for hwnd in [hwnd for hwnd in table_hashes if hwnd not in open_hwnds]:
+            del table_hashes[hwnd]
+
+        if not sweep_settings["detect_changes"]:
+            return captured, hashes, 0
+
+        changed, changed_hashes = [], []
+        for item, img_hash in zip(captured, hashes):
+            previous = table_hashes.get(item[0])
+            if previous is not None and hamming_distance(previous, img_hash) <= sweep_settings["change_threshold"]:
+                continue
+            changed.append(item)
+            changed_hashes.append(img_hash)
+
+        skipped = len(captured) - len(changed)
+        sweep_stats["tables_skipped"] += skipped
+
+    if skipped:
+        metrics.inc_counter("pokerbot_mesas_omitidas_total", skipped)
+    return changed, changed_hashes, skipped
+
+def get_seat_layout(config, seats=None):
+    """Rectángulos de nick de cada asiento para la sala y el tamaño de mesa configurados"""
+    seats = seats or config.get("asientos_mesa", 6)
+    room_layouts = config.get("asientos_layouts", {}).get(config["sala_default"], {})
+    layout = room_layouts.get(str(seats))
+    if not layout:
+        # Sin distribución para esta sala: se lee sólo la zona clásica del nick
+        log_message(f"Sin distribución de asientos para {config['sala_default']} ({seats} jugadores), "
+                    "se usa ocr_coords", level='warning')
+        return [config["ocr_coords"]]
+    return layout
+
+def lookup_seat(nick, config):
+    """Consulta stats y análisis existente de un asiento; devuelve None si falla"""
+    try:
+        with span("api", nick=nick):
+            stats_data = get_cached_stats(nick, config["sala_default"], config["token"], config["server_url"])
+        stats_data["player_name"] = nick
+        stats_summary = format_stats_summary(stats_data, config)
+
+        with span("buscar_analisis", nick=nick):
+            existing_analysis = find_existing_analysis(nick, stats_summary, config["sala_default"])
+            if not existing_analysis:
+                existing_analysis = analysis_cache.lookup_analysis(nick, config["sala_default"], stats_data)
+        return stats_data, stats_summary, existing_analysis
+    except Exception as e:
+        metrics.inc_counter("pokerbot_analisis_total", resultado="error")
+        log_message(f"Error al obtener stats de {nick}: {e}", level='error')
+        return None
+
+def analyze_full_table(hwnd, config, seats=None):
+    """Lee todos los asientos de una mesa con una captura, un lote OCR y consultas en paralelo"""
+    trace = tracing.start_trace("mesa_completa", hwnd=hwnd)
+    status = "ok"
+    try:
+        layout = get_seat_layout(config, seats)
+        if supports_input():
+            with span("foco"):
+                focus_window(hwnd)
+
+        # 1. Una captura para todos los asientos; la caché por imagen evita releer nicks conocidos
+        images = capture_seat_images(hwnd, layout)
+        hashes = [generate_image_hash(img) for img in images]
+        nicks = [nick_cache.lookup_nick(img_hash) for img_hash in hashes]
+        pending = [index for index, nick in enumerate(nicks) if not nick]
+        if pending:
+            with span("ocr", lote=len(pending)):
+                batch_nicks = read_nicks_batch([images[i] for i in pending])
+            for index, nick in zip(pending, batch_nicks):
+                nicks[index] = nick
+                if nick:
+                    nick_cache.store_nick(hashes[index], nick)
+
+        # Asientos vacíos o ilegibles se ignoran; un mismo nick leído dos veces se consulta una
+        seated = list(dict.fromkeys(nick for nick in nicks if nick))
+        log_message(f"Mesa completa: {len(seated)}/{len(layout)} asientos con nick")
+        if trace is not None:
+            trace["attributes"]["nicks"] = seated
+        if not seated:
+            status = "sin_nick"
+            return False
+
+        # 2. Stats de todos los jugadores en paralelo
+        def lookup_in_trace(nick):
+            # Cada consulta es una fase más de la traza de la mesa
+            tracing.retain_trace(trace)
+            return tracing.run_in_trace(trace, lookup_seat, nick, config)
+
+        max_workers = max(1, min(len(seated), int(config.get("auto_max_paralelo", 8))))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lookup_in_trace, seated))
+        found = [(nick, result) for nick, result in zip(seated, results) if result]
+        if not found:
+            status = "error"
             return False
 
+        # 3. Un solo pegado con una línea por jugador
+        combined = "\n".join(f"{nick}: {stats_summary}" for nick, (_, stats_summary, _) in found)
+        paste_analysis = config.get("asientos_pegar_analisis", False)
+        analyses = [f"{nick}: {analysis}" for nick, (_, _, analysis) in found if analysis]
+        paste_results(combined, "\n".join(analyses) if paste_analysis and analyses else None, hwnd, config)
+
+        # 4. Historial y análisis GPT de los jugadores sin análisis previo, sin volver a pegar
+        for nick, (stats_data, stats_summary, existing_analysis) in found:
+            if existing_analysis:
+                deliver_results(hwnd, nick, stats_summary, existing_analysis, config, paste=False)
+            else:
+                submit_analysis(hwnd, nick, stats_data, stats_summary, config, True, paste=False)
+
+        log_message(f"Mesa completa analizada: {len(found)}/{len(seated)} jugadores")
+        return True
+
     except Exception as e:
-        log_message(f"Error en análisis de mesa: {e}", level='error')
+        status = "error"
+        log_message(f"Error al leer mesa completa: {e}", level='error')
         import traceback
         log_message(traceback.format_exc(), level='error')
         return False
+    finally:
+        tracing.end_trace(trace, status)
 
 def paste_results(stats_summary, analysis, hwnd, config):
+    """Pega los resultados en la mesa indicada; el lock evita que dos análisis mezclen portapapeles y foco"""
+    # stats_summary o analysis a None: esa parte ya se pegó o aún no está lista
     result = ""
-    if config["mostrar_stats"]:
+    if config["mostrar_stats"] and stats_summary:
         result += f"{stats_summary}\n"
-    if config["mostrar_analisis"]:
+    if config["mostrar_analisis"] and analysis:
         result += f"{analysis}"
 
     if not result:
         log_message("No hay contenido para mostrar según la configuración")
         return False
 
-    return paste_to_poker(result)
+    if not supports_input():
+        log_message("Backend de captura sin ventanas reales, se omite el pegado")
+        return True
+
+    with span("pegado"):
+        with paste_lock:
+            if hwnd:
+                focus_window(hwnd)
+            return paste_to_poker(result)
 
 def show_copy_options_dialog(parent_window, stats, analysis, hwnd, config):
     try:
@@ -276,10 +650,9 @@ def show_copy_options_dialog(parent_window, stats, analysis, hwnd, config):
         paste_results(stats, analysis, hwnd, config)
 
 def get_last_analysis_results():
-    history = load_history()
-    if not history:
+    last_entry = get_last_history_entry()
+    if not last_entry:
         return None, None
-    last_entry = history[-1]
     return last_entry.get("stats", ""), last_entry.get("analisis", "")
 
 def copy_last_stats_to_clipboard():
@@ -309,4 +682,55 @@ def copy_last_results_to_clipboard():
         pyperclip.copy(combined)
         log_message("Últimos resultados copiados al portapapeles")
         return True
-    return False
\ No newline at end of file
+    return False
+
+def benchmark_replay_pipeline(config, num_tables=8, sweeps=3):
+    """Mide el pipeline nick→stats→análisis sobre capturas guardadas, sin ventanas de Windows"""
+    config = dict(config, captura_backend="replay")
+    load_capture_settings(config)
+
+    # Identificadores ficticios de ventana: el backend replay ignora el hwnd
+    tables = [(1000 + i, f"Replay {i + 1} 1/2") for i in range(num_tables)]
+    timings = []
+    stats_timings = []
+
+    for sweep in range(sweeps):
+        clear_nick_cache()
+        start = time.perf_counter()
+        completed = analyze_tables_batch(tables, config)
+        stats_elapsed = time.perf_counter() - start
+        wait_for_pending_analyses()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        stats_timings.append(stats_elapsed)
+        log_message(f"Benchmark replay: barrido {sweep + 1}/{sweeps}, {completed}/{num_tables} mesas, "
+                    f"stats en {stats_elapsed:.2f}s, análisis en {elapsed:.2f}s")
+
+    return {
+        "mesas": num_tables,
+        "barridos": sweeps,
+        "media_stats_s": sum(stats_timings) / len(stats_timings) if stats_timings else 0.0,
+        "media_s": sum(timings) / len(timings) if timings else 0.0,
+        "min_s": min(timings) if timings else 0.0,
+        "max_s": max(timings) if timings else 0.0,
+        "etapas_ms": {
+            stage: {key: round(value, 1) for key, value in values.items()}
+            for stage, values in tracing.get_stage_percentiles().items()
+        }
+    }
+
+if __name__ == "__main__":
+    # python -m src.core.poker_analyzer [mesas] [barridos]
+    import sys
+    from src.config.settings import load_config
+    from src.core.ocr_engine import initialize_ocr, shutdown_ocr
+
+    bench_config = load_config()
+    initialize_ocr(bench_config)
+    try:
+        num_tables = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+        sweeps = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+        print(benchmark_replay_pipeline(bench_config, num_tables, sweeps))
+        tracing.dump_traces()
+    finally:
+        shutdown_ocr()
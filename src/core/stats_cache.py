@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from src.utils.logger import log_message
+from src.core.api_client import PlayerNotFoundError
+from src.core.nick_candidates import search_player_stats
+
+STATS_CACHE_PATH = Path("config/stats_cache.json")
+
+# Caché global (sala, nick) -> {"data": stats o None si no existe, "timestamp": epoch}
+stats_entries = {}
+cache_lock = threading.Lock()
+cache_settings = {
+    "ttl": 300,  # segundos en los que los stats se sirven sin consultar la API
+    "stale": 3600,  # segundos extra en los que se sirven y se refrescan en segundo plano
+    "negative_ttl": 60,  # segundos que se recuerda un jugador inexistente (404)
+    "persistent": False
+}
+cache_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+
+# Consultas en curso por clave, para no repetir la misma petición
+inflight_requests = {}
+refresh_executor = None
+
+def load_stats_cache_settings(config):
+    """Actualiza TTLs y persistencia de la caché de stats desde la configuración"""
+    cache_settings["ttl"] = max(0.0, float(config.get("stats_cache_ttl", 300)))
+    cache_settings["stale"] = max(0.0, float(config.get("stats_cache_stale", 3600)))
+    cache_settings["negative_ttl"] = max(0.0, float(config.get("stats_cache_negativo_ttl", 60)))
+    cache_settings["persistent"] = bool(config.get("stats_cache_persistente", False))
+
+    if cache_settings["persistent"]:
+        load_stats_cache()
+
+def _get_refresh_executor():
+    """Devuelve el executor de refrescos en segundo plano, creándolo la primera vez"""
+    global refresh_executor
+
+    with cache_lock:
+        if refresh_executor is None:
+            refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stats-refresh")
+        return refresh_executor
+
+def _fetch_and_store(key, token, server_url):
+    """Consulta la API una sola vez por clave aunque varios hilos pidan el mismo jugador"""
+    sala, nick = key
+
+    with cache_lock:
+        future = inflight_requests.get(key)
+        owner = future is None
+        if owner:
+            future = inflight_requests[key] = Future()
+
+    if not owner:
+        return dict(future.result())
+
+    try:
+        data = search_player_stats(nick, sala, token, server_url)
+        with cache_lock:
+            stats_entries[key] = {"data": dict(data), "timestamp": time.time()}
+        future.set_result(data)
+        return dict(data)
+    except PlayerNotFoundError as e:
+        with cache_lock:
+            stats_entries[key] = {"data": None, "timestamp": time.time()}
+        future.set_exception(e)
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with cache_lock:
+            inflight_requests.pop(key, None)
+
+def _refresh_in_background(key, token, server_url):
+    """Programa el refresco de una entrada caducada sin bloquear al llamador"""
+    with cache_lock:
+        if key in inflight_requests:
+            return
+        cache_stats["refreshes"] += 1
+
+    def refresh():
+        try:
+            _fetch_and_store(key, token, server_url)
+        except PlayerNotFoundError:
+            log_message(f"Jugador {key[1]} ya no existe en {key[0]}", level='warning')
+        except Exception as e:
+            # Se mantiene la entrada anterior hasta el próximo intento
+            log_message(f"Error al refrescar stats de {key[1]}: {e}", level='warning')
+
+    _get_refresh_executor().submit(refresh)
+
+def get_cached_stats(nick, sala, token, server_url):
+    """Obtiene stats de la caché si están frescos; si están caducados los sirve y refresca en segundo plano"""
+    key = (sala, nick)
+    now = time.time()
+
+    with cache_lock:
+        entry = stats_entries.get(key)
+
+    if entry is not None:
+        age = now - entry["timestamp"]
+
+        if entry["data"] is None:
+            if age <= cache_settings["negative_ttl"]:
+                with cache_lock:
+                    cache_stats["hits"] += 1
+                raise PlayerNotFoundError(f"Jugador no encontrado: {nick} (caché)")
+        elif age <= cache_settings["ttl"]:
+            with cache_lock:
+                cache_stats["hits"] += 1
+            return dict(entry["data"])
+        elif age <= cache_settings["ttl"] + cache_settings["stale"]:
+            with cache_lock:
+                cache_stats["stale_hits"] += 1
+            _refresh_in_background(key, token, server_url)
+            return dict(entry["data"])
+
+    with cache_lock:
+        cache_stats["misses"] += 1
+    return _fetch_and_store(key, token, server_url)
+
+def invalidate_stats(nick, sala):
+    """Elimina los stats guardados de un jugador"""
+    with cache_lock:
+        stats_entries.pop((sala, nick), None)
+
+def clear_stats_cache():
+    """Vacía la caché de stats y reinicia los contadores"""
+    with cache_lock:
+        stats_entries.clear()
+        for counter in cache_stats:
+            cache_stats[counter] = 0
+    log_message("Caché de stats limpiada")
+
+def get_stats_cache_stats():
+    """Devuelve tamaño, aciertos, aciertos caducados y fallos de la caché de stats"""
+    with cache_lock:
+        total = cache_stats["hits"] + cache_stats["stale_hits"] + cache_stats["misses"]
+        return {
+            "entradas": len(stats_entries),
+            "aciertos": cache_stats["hits"],
+            "aciertos_caducados": cache_stats["stale_hits"],
+            "fallos": cache_stats["misses"],
+            "refrescos": cache_stats["refreshes"],
+            "tasa_acierto": (cache_stats["hits"] + cache_stats["stale_hits"]) / total if total else 0.0
+        }
+
+def load_stats_cache():
+    """Carga desde disco las entradas guardadas en la sesión anterior que sigan vigentes"""
+    try:
+        if not STATS_CACHE_PATH.exists():
+            return 0
+
+        with open(STATS_CACHE_PATH, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+
+        now = time.time()
+        max_age = cache_settings["ttl"] + cache_settings["stale"]
+        loaded = 0
+        with cache_lock:
+            for item in saved:
+                if now - item["timestamp"] > max_age:
+                    continue
+                stats_entries[(item["sala"], item["nick"])] = {
+                    "data": item["data"],
+                    "timestamp": item["timestamp"]
+                }
+                loaded += 1
+
+        log_message(f"Caché de stats cargada: {loaded} entradas")
+        return loaded
+    except Exception as e:
+        log_message(f"Error al cargar caché de stats: {e}", level='warning')
+        return 0
+
+def save_stats_cache():
+    """Guarda la caché de stats en disco si la persistencia está activada"""
+    if not cache_settings["persistent"]:
+        return False
+
+    try:
+        with cache_lock:
+            items = [
+                {"sala": sala, "nick": nick, "data": entry["data"], "timestamp": entry["timestamp"]}
+                for (sala, nick), entry in stats_entries.items()
+            ]
+
+        STATS_CACHE_PATH.parent.mkdir(exist_ok=True)
+        # Escribir en un temporal y reemplazar para no dejar un archivo a medias
+        tmp_path = STATS_CACHE_PATH.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False)
+        os.replace(tmp_path, STATS_CACHE_PATH)
+
+        log_message(f"Caché de stats guardada: {len(items)} entradas")
+        return True
+    except Exception as e:
+        log_message(f"Error al guardar caché de stats: {e}", level='error')
+        return False
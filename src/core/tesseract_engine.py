@@ -0,0 +1,160 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from src.utils.logger import log_message
+
+try:
+    # API nativa: el motor y los modelos de idioma se cargan una sola vez
+    from tesserocr import PyTessBaseAPI, PSM, OEM
+except ImportError:  # Sin tesserocr se usa pytesseract, que lanza un proceso por lectura
+    PyTessBaseAPI = None
+    PSM = None
+    OEM = None
+
+tesseract_settings = {
+    "languages": "chi_sim+jpn+kor+eng",
+    "tessdata": "",  # vacío = ruta por defecto de la instalación
+    "cache_size": 256
+}
+
+# Motor residente (no es thread-safe: se usa con engine_lock)
+tess_api = None
+engine_lock = threading.Lock()
+engine_failed = False
+
+# Resultados ya leídos: huella de la imagen -> [(texto, confianza)] (orden LRU)
+result_cache = OrderedDict()
+cache_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0}
+
+def load_tesseract_settings(config):
+    """Actualiza idiomas, ruta de datos y tamaño de caché; reinicia el motor si cambian"""
+    languages = config.get("tesseract_idiomas", "chi_sim+jpn+kor+eng")
+    tessdata = config.get("tesseract_tessdata", "")
+    changed = (languages != tesseract_settings["languages"] or tessdata != tesseract_settings["tessdata"])
+
+    tesseract_settings["languages"] = languages
+    tesseract_settings["tessdata"] = tessdata
+    tesseract_settings["cache_size"] = max(0, int(config.get("tesseract_cache_max", 256)))
+
+    if changed:
+        shutdown_tesseract()
+        clear_tesseract_cache()
+
+def _get_api():
+    """Devuelve el motor residente, creándolo la primera vez (llamar con engine_lock)"""
+    global tess_api, engine_failed
+
+    if tess_api is None and PyTessBaseAPI is not None and not engine_failed:
+        try:
+            kwargs = {"lang": tesseract_settings["languages"], "psm": PSM.SINGLE_LINE, "oem": OEM.DEFAULT}
+            if tesseract_settings["tessdata"]:
+                kwargs["path"] = tesseract_settings["tessdata"]
+            tess_api = PyTessBaseAPI(**kwargs)
+            log_message(f"Tesseract residente inicializado ({tesseract_settings['languages']})")
+        except Exception as e:
+            # Sin modelos o sin la librería nativa: seguir con pytesseract
+            engine_failed = True
+            log_message(f"No se pudo inicializar tesserocr, se usará pytesseract: {e}", level='warning')
+    return tess_api
+
+def preload_tesseract():
+    """Carga el motor y los idiomas en segundo plano para que la primera lectura no espere"""
+    if PyTessBaseAPI is None:
+        return None
+
+    def load():
+        with engine_lock:
+            _get_api()
+
+    thread = threading.Thread(target=load, name="tesseract-preload", daemon=True)
+    thread.start()
+    return thread
+
+def shutdown_tesseract():
+    """Libera el motor residente"""
+    global tess_api, engine_failed
+
+    with engine_lock:
+        if tess_api is not None:
+            try:
+                tess_api.End()
+            except Exception:
+                pass
+            tess_api = None
+        engine_failed = False
+
+def _image_digest(img):
+    """Huella exacta de la imagen: la misma captura no se vuelve a leer"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{img.mode}:{img.size}".encode())
+    digest.update(img.tobytes())
+    return digest.digest()
+
+def _read_resident(api, img):
+    """Lee una línea con el motor residente; la confianza es la media de Tesseract"""
+    api.SetImage(img)
+    text = api.GetUTF8Text().strip()
+    confidence = api.MeanTextConf() / 100.0
+    api.Clear()
+    return text, confidence
+
+def _read_subprocess(img):
+    """Lectura con pytesseract (un proceso por imagen)"""
+    import pytesseract
+    custom_config = f"--oem 3 --psm 7 -l {tesseract_settings['languages']}"
+    if tesseract_settings["tessdata"]:
+        custom_config += f' --tessdata-dir "{tesseract_settings["tessdata"]}"'
+    # Sin confianza por palabra: valor fijo como el resto de lecturas de respaldo
+    return pytesseract.image_to_string(img, config=custom_config).strip(), 0.8
+
+def read_text(img):
+    """Lee el texto de una imagen con Tesseract y devuelve [(texto, confianza)]"""
+    key = _image_digest(img) if tesseract_settings["cache_size"] else None
+    if key is not None:
+        with cache_lock:
+            cached = result_cache.get(key)
+            if cached is not None:
+                result_cache.move_to_end(key)
+                cache_stats["hits"] += 1
+                return list(cached)
+            cache_stats["misses"] += 1
+
+    with engine_lock:
+        api = _get_api()
+        if api is not None:
+            text, confidence = _read_resident(api, img)
+        else:
+            text = None
+
+    if text is None:
+        text, confidence = _read_subprocess(img)
+
+    detected_texts = [(text, confidence)] if text else []
+
+    if key is not None:
+        with cache_lock:
+            result_cache[key] = detected_texts
+            while len(result_cache) > tesseract_settings["cache_size"]:
+                result_cache.popitem(last=False)
+    return list(detected_texts)
+
+def clear_tesseract_cache():
+    """Vacía la caché de resultados de Tesseract"""
+    with cache_lock:
+        result_cache.clear()
+        for counter in cache_stats:
+            cache_stats[counter] = 0
+
+def get_tesseract_stats():
+    """Devuelve el motor en uso y los aciertos de la caché de Tesseract"""
+    with cache_lock:
+        total = cache_stats["hits"] + cache_stats["misses"]
+        return {
+            "motor": "tesserocr" if tess_api is not None else "pytesseract",
+            "entradas": len(result_cache),
+            "aciertos": cache_stats["hits"],
+            "fallos": cache_stats["misses"],
+            "tasa_acierto": cache_stats["hits"] / total if total else 0.0
+        }
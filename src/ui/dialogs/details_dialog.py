@@ -438,21 +438,14 @@ def show_details_dialog(parent, history_entry, config):
         # Actualizar entrada de historial
         history_entry["notas"] = notes
         
-        # Guardar historial actualizado
-        from src.core.history_manager import load_history, save_history
-        history = load_history()
-        
         # Buscar y actualizar entrada en el historial
-        updated = False
-        for i, entry in enumerate(history):
-            if (entry.get("timestamp") == history_entry.get("timestamp") and 
-                entry.get("nick") == history_entry.get("nick")):
-                history[i] = history_entry
-                updated = True
-                break
+        from src.core.history_manager import find_history_entry, update_history_entry
+        timestamp = history_entry.get("timestamp")
+        nick = history_entry.get("nick")
+        updated = find_history_entry(timestamp, nick) is not None
         
         if updated:
-            if save_history(history):
+            if update_history_entry(timestamp, nick, {"notas": notes}):
                 if USING_COMPAT:
                     show_toast("PokerBot Pro", "Notas guardadas correctamente")
                 elif USING_TTKBOOTSTRAP and HAS_TOAST:
@@ -49,7 +49,7 @@ except ImportError:
 
 from src.utils.logger import log_message, get_logger
 from src.utils.windows import get_window_under_cursor, find_poker_tables
-from src.core.poker_analyzer import analyze_table
+from src.core.poker_analyzer import analyze_table, analyze_tables_batch
 from src.ui.tabs.main_tab import create_main_tab
 from src.ui.tabs.history_tab import create_history_tab
 from src.ui.tabs.config_tab import create_config_tab
@@ -398,23 +398,13 @@ def fallback_interface(config):
         
         # Historial simple
         history_tab = ttk.Frame(tab_control)
-        history_tree = ttk.Treeview(history_tab, columns=("fecha", "nick", "sala", "stats"), show="headings", height=10)
-        history_tree.heading("fecha", text="Fecha")
-        history_tree.heading("nick", text="Nick")
-        history_tree.heading("sala", text="Sala")
-        history_tree.heading("stats", text="Stats")
+        from src.ui.tabs.history_tab import create_history_view, update_history_treeview
+        history_tree = create_history_view(history_tab)
         
         # Guardar referencia
         history_treeview = history_tree
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(history_tab, orient="vertical", command=history_tree.yview)
-        history_tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side="right", fill="y")
-        history_tree.pack(fill="both", expand=True, padx=10, pady=10)
-        
         # Cargar historial
-        from src.ui.tabs.history_tab import update_history_treeview
         update_history_treeview(history_tree)
         
         tab_control.add(history_tab, text='Historial')
@@ -575,13 +565,9 @@ def auto_mode_loop(config):
         try:
             tables = find_poker_tables()
             if tables:
-                for hwnd, title in tables:
-                    if not auto_running or not running:
-                        break
-                    
-                    log_message(f"Procesando mesa: {title}")
-                    analyze_table(hwnd, config)
-                    time.sleep(1)  # Pausa entre mesas
+                # Barrido por lotes: capturar todas las mesas, un OCR y consultas en paralelo
+                log_message(f"Procesando {len(tables)} mesas automáticamente")
+                analyze_tables_batch(tables, config, lambda: auto_running and running)
             
             # Esperar antes de siguiente ciclo
             for _ in range(config["auto_check_interval"]):
@@ -736,6 +722,36 @@ def on_closing():
         running = False
         auto_running = False
         
+        # Detener workers OCR
+        try:
+            from src.core.ocr_engine import shutdown_ocr
+            shutdown_ocr()
+        except Exception as e:
+            log_message(f"Error al detener OCR: {e}", level='warning')
+        
+        # Cancelar análisis GPT pendientes
+        try:
+            from src.core.poker_analyzer import shutdown_analysis_executor
+            shutdown_analysis_executor()
+        except Exception as e:
+            log_message(f"Error al detener análisis GPT: {e}", level='warning')
+        
+        # Guardar cachés de stats y análisis para la próxima sesión
+        try:
+            from src.core.stats_cache import save_stats_cache
+            from src.core.analysis_cache import save_analysis_cache
+            save_stats_cache()
+            save_analysis_cache()
+        except Exception as e:
+            log_message(f"Error al guardar cachés: {e}", level='warning')
+        
+        # Cerrar la base de datos del historial
+        try:
+            from src.core.history_manager import close_history
+            close_history()
+        except Exception as e:
+            log_message(f"Error al cerrar historial: {e}", level='warning')
+        
         # Guardar configuración final
         try:
             config = get_current_config()
@@ -5,7 +5,6 @@ from tkinter import messagebox
 try:
     import ttkbootstrap as ttk
     from ttkbootstrap.constants import *
-    from ttkbootstrap.tableview import Tableview
     # Intentar importar el módulo de diálogos de ttkbootstrap
     try:
         from ttkbootstrap.dialogs import Messagebox as ttk_Messagebox
@@ -15,27 +14,24 @@ try:
     USING_TTKBOOTSTRAP = True
 except ImportError:
     from tkinter import ttk
-    Tableview = None
     HAS_TTK_MESSAGEBOX = False
     USING_TTKBOOTSTRAP = False
 
 from src.utils.logger import log_message
-from src.core.history_manager import load_history, save_history
+from src.core.history_manager import load_history_page, count_history, find_history_entry, get_history_version
 from src.ui.dialogs.details_dialog import show_details_dialog
 import threading
 
-def is_tableview_available():
-    """Comprueba si Tableview está disponible sin errores"""
-    try:
-        # Intenta crear un Tableview sin usarlo realmente
-        # para comprobar si hay errores
-        from ttkbootstrap.tableview import Tableview
-        return True
-    except Exception:
-        return False
+# Filas que se crean al inicio; la tabla crece o se reduce con la ventana
+history_visible_rows = 20
+
+HISTORY_COLUMNS = (("fecha", "Fecha", 150), ("nick", "Nick", 150), ("sala", "Sala", 50), ("stats", "Stats", 400))
 
 def create_history_tab(parent, config):
     """Crea la pestaña de historial"""
+    global history_visible_rows
+    history_visible_rows = max(1, int(config.get("historial_filas", 20)))
+    
     # Crear frame principal
     tab = ttk.Frame(parent)
     tab.name = "tab_historial"
@@ -71,82 +67,8 @@ def create_history_tab(parent, config):
     except Exception:
         ttk.Button(search_frame, text="Buscar", command=search_history).pack(side="left", padx=5)
     
-    # Crear treeview para historial
-    coldata = [
-        {"text": "Fecha", "stretch": False, "width": 150},
-        {"text": "Nick", "stretch": True, "width": 150},
-        {"text": "Sala", "stretch": False, "width": 50},
-        {"text": "Stats", "stretch": True, "width": 400},
-    ]
-    
-    # Creación condicional del widget de historial
-    try:
-        if USING_TTKBOOTSTRAP and Tableview and is_tableview_available():
-            try:
-                history_tree = Tableview(
-                    master=tab,
-                    coldata=coldata,
-                    rowdata=[],
-                    paginated=True,
-                    searchable=True,
-                    bootstyle="primary",
-                    pagesize=15,
-                    height=10
-                )
-                # Almacenar explícitamente los datos de columna para uso posterior
-                history_tree.saved_coldata = coldata
-                history_tree._is_tableview = True
-                history_tree._is_listbox = False
-            except Exception as e:
-                log_message(f"Error al crear Tableview: {e}", level='debug')
-                # Fallback a Treeview estándar
-                history_tree = ttk.Treeview(tab, columns=("fecha", "nick", "sala", "stats"), show="headings", height=10)
-                history_tree.heading("fecha", text="Fecha")
-                history_tree.heading("nick", text="Nick")
-                history_tree.heading("sala", text="Sala")
-                history_tree.heading("stats", text="Stats")
-                
-                history_tree.column("fecha", width=150)
-                history_tree.column("nick", width=150)
-                history_tree.column("sala", width=50)
-                history_tree.column("stats", width=400)
-                
-                # Añadir scrollbar para el treeview
-                scrollbar = ttk.Scrollbar(tab, orient="vertical", command=history_tree.yview)
-                history_tree.configure(yscrollcommand=scrollbar.set)
-                scrollbar.pack(side="right", fill="y")
-                history_tree._is_tableview = False
-                history_tree._is_listbox = False
-        else:
-            # Fallback a Treeview estándar
-            history_tree = ttk.Treeview(tab, columns=("fecha", "nick", "sala", "stats"), show="headings", height=10)
-            history_tree.heading("fecha", text="Fecha")
-            history_tree.heading("nick", text="Nick")
-            history_tree.heading("sala", text="Sala")
-            history_tree.heading("stats", text="Stats")
-            
-            history_tree.column("fecha", width=150)
-            history_tree.column("nick", width=150)
-            history_tree.column("sala", width=50)
-            history_tree.column("stats", width=400)
-            
-            # Añadir scrollbar para el treeview
-            scrollbar = ttk.Scrollbar(tab, orient="vertical", command=history_tree.yview)
-            history_tree.configure(yscrollcommand=scrollbar.set)
-            scrollbar.pack(side="right", fill="y")
-            history_tree._is_tableview = False
-            history_tree._is_listbox = False
-    except Exception as e:
-        log_message(f"Error al crear cualquier tipo de tabla: {e}", level='error')
-        # Última opción: un listbox simple
-        history_tree = tk.Listbox(tab, height=10)
-        scrollbar = ttk.Scrollbar(tab, orient="vertical", command=history_tree.yview)
-        history_tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side="right", fill="y")
-        history_tree._is_tableview = False
-        history_tree._is_listbox = True
-    
-    history_tree.pack(fill="both", expand=True, padx=10, pady=5)
+    # Tabla virtual: sólo existen las filas visibles y se rellenan al desplazarse
+    history_tree = create_history_view(tab, history_visible_rows)
     
     # Frame para botones
     frame_buttons = ttk.Frame(tab, padding=10)
@@ -158,48 +80,7 @@ def create_history_tab(parent, config):
             # Asegurar que messagebox esté disponible
             from tkinter import messagebox
             
-            if hasattr(history_tree, '_is_tableview') and history_tree._is_tableview:
-                selected = history_tree.get_rows(selected=True)
-                if not selected:
-                    if USING_TTKBOOTSTRAP and HAS_TTK_MESSAGEBOX:
-                        try:
-                            ttk_Messagebox.show_warning("Sin selección", "Selecciona una entrada para ver detalles")
-                        except:
-                            messagebox.showwarning("Sin selección", "Selecciona una entrada para ver detalles")
-                    else:
-                        messagebox.showwarning("Sin selección", "Selecciona una entrada para ver detalles")
-                    return
-                
-                # TableRow en ttkbootstrap es un objeto especial que necesita ser accedido de otra manera
-                selected_item = selected[0]
-                try:
-                    # Para TableRow objects
-                    if hasattr(selected_item, 'values'):
-                        # Acceder a los valores como atributos
-                        date = selected_item.values[0]
-                        nick = selected_item.values[1]
-                    elif hasattr(selected_item, 'text'):
-                        # Acceso alternativo
-                        values = [cell.text for cell in selected_item.cells]
-                        date = values[0]
-                        nick = values[1]
-                    else:
-                        # Si nada funciona, intentar como lista/tupla (forma antigua)
-                        date = selected_item[0]
-                        nick = selected_item[1]
-                except Exception as e:
-                    log_message(f"Error al acceder a TableRow: {e}", level='error')
-                    log_message(f"Tipo de selected_item: {type(selected_item)}", level='debug')
-                    log_message(f"Atributos disponibles: {dir(selected_item)}", level='debug')
-                    # Intentar otra forma de obtener la fila seleccionada
-                    try:
-                        row_id = history_tree.selection()[0]
-                        date = history_tree.item(row_id, 'values')[0]
-                        nick = history_tree.item(row_id, 'values')[1]
-                    except:
-                        messagebox.showwarning("Error", "No se pudieron obtener los detalles. Intenta con otra fila.")
-                        return
-            elif hasattr(history_tree, 'selection') and callable(getattr(history_tree, 'selection')):
+            if hasattr(history_tree, 'selection') and callable(getattr(history_tree, 'selection')):
                 # Para Treeview estándar
                 selection = history_tree.selection()
                 if not selection:
@@ -234,13 +115,7 @@ def create_history_tab(parent, config):
             log_message(f"Buscando detalles para {nick} del {date}")
             
             # Buscar en historial
-            history = load_history()
-            entry = None
-            
-            for hist_entry in history:
-                if hist_entry.get("timestamp") == date and hist_entry.get("nick") == nick:
-                    entry = hist_entry
-                    break
+            entry = find_history_entry(date, nick)
             
             if entry:
                 show_details_dialog(parent, entry, config)
@@ -309,159 +184,146 @@ def create_history_tab(parent, config):
     
     return tab, history_tree
 
+def create_history_view(parent, rows=20):
+    """Crea la tabla virtual del historial: un conjunto fijo de filas que se rellena según el desplazamiento"""
+    try:
+        tree = ttk.Treeview(parent, columns=[column for column, _, _ in HISTORY_COLUMNS],
+                            show="headings", height=rows, selectmode="browse")
+        for column, title, width in HISTORY_COLUMNS:
+            tree.heading(column, text=title)
+            tree.column(column, width=width, stretch=column in ("nick", "stats"))
+        tree._is_listbox = False
+    except Exception as e:
+        log_message(f"Error al crear tabla de historial: {e}", level='error')
+        # Última opción: un listbox simple
+        tree = tk.Listbox(parent, height=rows)
+        tree._is_listbox = True
+    
+    # La barra no desplaza el widget: mueve la ventana de entradas que se muestra
+    scrollbar = ttk.Scrollbar(parent, orient="vertical", command=lambda *args: _scroll_history(tree, *args))
+    scrollbar.pack(side="right", fill="y")
+    tree.pack(fill="both", expand=True, padx=10, pady=5)
+    
+    tree._scrollbar = scrollbar
+    tree._visible_rows = rows
+    tree._row_ids = []  # filas existentes en el Treeview
+    tree._row_values = []  # valores mostrados en cada fila
+    tree._offset = 0  # posición de la primera fila visible en el historial
+    tree._total = 0
+    tree._search = None
+    tree._version = None  # versión del historial mostrada
+    
+    # Rueda del ratón (Windows/macOS y X11) y teclas de página
+    tree.bind("<MouseWheel>", lambda e: _scroll_history(tree, "scroll", -3 if e.delta > 0 else 3, "units") or "break")
+    tree.bind("<Button-4>", lambda e: _scroll_history(tree, "scroll", -3, "units") or "break")
+    tree.bind("<Button-5>", lambda e: _scroll_history(tree, "scroll", 3, "units") or "break")
+    tree.bind("<Prior>", lambda e: _scroll_history(tree, "scroll", -1, "pages") or "break")
+    tree.bind("<Next>", lambda e: _scroll_history(tree, "scroll", 1, "pages") or "break")
+    if not tree._is_listbox:
+        tree.bind("<Configure>", lambda e: _resize_history_view(tree, e.height))
+    
+    return tree
+
+def _resize_history_view(tree, height):
+    """Ajusta el número de filas al alto disponible de la tabla"""
+    try:
+        bbox = tree.bbox(tree._row_ids[0]) if tree._row_ids else ""
+        if not bbox:
+            return
+        header, row_height = bbox[1], bbox[3]
+        rows = max(1, (height - header) // max(1, row_height))
+        if rows != tree._visible_rows:
+            tree._visible_rows = rows
+            tree._offset = min(tree._offset, max(0, tree._total - rows))
+            _render_history(tree)
+    except Exception as e:
+        log_message(f"Error al redimensionar historial: {e}", level='debug')
+
+def _scroll_history(tree, action, amount, unit=None):
+    """Atiende la barra de desplazamiento, la rueda y las teclas de página"""
+    if action == "moveto":
+        offset = int(float(amount) * tree._total)
+    elif action == "scroll":
+        step = tree._visible_rows if unit == "pages" else 1
+        offset = tree._offset + int(amount) * step
+    else:
+        return
+    
+    offset = max(0, min(offset, tree._total - tree._visible_rows))
+    if offset == tree._offset:
+        return
+    
+    tree._offset = offset
+    # La selección pertenece a la fila, no a la entrada: se descarta al desplazarse
+    if tree._is_listbox:
+        tree.selection_clear(0, tk.END)
+    else:
+        tree.selection_remove(*tree.selection())
+    _render_history(tree)
+
+def _render_history(tree):
+    """Rellena las filas visibles, modificando sólo las que cambiaron"""
+    page = load_history_page(tree._offset, tree._visible_rows, tree._search)
+    rows = [
+        (entry.get("timestamp", "Sin fecha"), entry.get("nick", "Sin nick"),
+         entry.get("sala", "---"), entry.get("stats", "Sin stats"))
+        for entry in page
+    ]
+    if not rows and tree._search:
+        rows = [("", "No se encontraron resultados", "", "")]
+    
+    if tree._is_listbox:
+        for index, values in enumerate(rows):
+            if index < len(tree._row_values):
+                if tree._row_values[index] == values:
+                    continue
+                tree.delete(index)
+            tree.insert(index, f"{values[0]} - {values[1]} - {values[2]} - {values[3]}")
+        if len(tree._row_values) > len(rows):
+            tree.delete(len(rows), tk.END)
+    else:
+        for index, values in enumerate(rows):
+            if index >= len(tree._row_ids):
+                tree._row_ids.append(tree.insert("", "end", values=values))
+            elif tree._row_values[index] != values:
+                tree.item(tree._row_ids[index], values=values)
+        for row_id in tree._row_ids[len(rows):]:
+            tree.delete(row_id)
+        del tree._row_ids[len(rows):]
+    tree._row_values = rows
+    
+    if tree._total:
+        tree._scrollbar.set(tree._offset / tree._total, min(1.0, (tree._offset + len(page)) / tree._total))
+    else:
+        tree._scrollbar.set(0.0, 1.0)
+
 def update_history_treeview(tree, search_text=None):
-    """Actualiza el treeview con los datos del historial"""
-    if not tree:
+    """Actualiza la tabla del historial si cambió el historial o la búsqueda (None mantiene la búsqueda actual)"""
+    if not tree or not hasattr(tree, "_row_values"):
         log_message("No se pudo acceder al widget de historial", level='warning')
         return
     
     try:
-        # Determinar qué tipo de widget es
-        is_tableview = hasattr(tree, '_is_tableview') and tree._is_tableview
-        is_listbox = hasattr(tree, '_is_listbox') and tree._is_listbox
-        
-        # Limpiar widget según su tipo
-        try:
-            if is_tableview:
-                # Para Tableview
-                if hasattr(tree, 'delete_rows'):
-                    tree.delete_rows()
-                else:
-                    log_message("El Tableview no tiene método delete_rows", level='warning')
-            elif is_listbox:
-                # Para Listbox
-                tree.delete(0, tk.END)
-            else:
-                # Para Treeview estándar
-                for item in tree.get_children():
-                    tree.delete(item)
-        except Exception as e:
-            log_message(f"Error al limpiar widget de historial: {e}", level='warning')
-        
-        # Cargar historial
-        history = load_history()
-        
-        log_message(f"Actualizando treeview con {len(history)} entradas de historial")
-        
-        if not history:
-            log_message("No hay entradas en el historial")
+        version = get_history_version()
+        search = tree._search if search_text is None else (search_text or None)
+        if version == tree._version and search == tree._search:
             return
         
-        # Filtrar por búsqueda si es necesario
-        filtered_entries = []
+        total = count_history(search)
+        if search != tree._search:
+            tree._offset = 0
+        elif tree._offset and not search and tree._version is not None:
+            # Las entradas nuevas se añaden arriba: mantener a la vista las mismas filas
+            tree._offset += max(0, total - tree._total)
         
-        if search_text:
-            for entry in history:
-                nick = entry.get("nick", "").lower()
-                stats = entry.get("stats", "").lower()
-                analysis = entry.get("analisis", "").lower()
-                
-                if search_text in nick or search_text in stats or search_text in analysis:
-                    filtered_entries.append(entry)
-        else:
-            filtered_entries = history
+        tree._search = search
+        tree._version = version
+        tree._total = total
+        tree._offset = max(0, min(tree._offset, total - tree._visible_rows))
+        _render_history(tree)
         
-        if filtered_entries:
-            # Preparar datos para mostrar
-            rowdata = []
-            for entry in reversed(filtered_entries):  # Más recientes primero
-                timestamp = entry.get("timestamp", "Sin fecha")
-                nick = entry.get("nick", "Sin nick")
-                sala = entry.get("sala", "---")
-                stats = entry.get("stats", "Sin stats")
-                
-                rowdata.append((timestamp, nick, sala, stats))
-            
-            # Actualizar widget según su tipo
-            try:
-                if is_tableview:
-                    # Para Tableview - usar los datos de columna guardados
-                    if hasattr(tree, 'saved_coldata'):
-                        tree.build_table_data(coldata=tree.saved_coldata, rowdata=rowdata)
-                    elif hasattr(tree, 'configure'):
-                        # Si no tenemos saved_coldata, intentamos un enfoque alternativo
-                        log_message("Usando método alternativo para Tableview", level='debug')
-                        default_coldata = [
-                            {"text": "Fecha", "stretch": False, "width": 150},
-                            {"text": "Nick", "stretch": True, "width": 150},
-                            {"text": "Sala", "stretch": False, "width": 50},
-                            {"text": "Stats", "stretch": True, "width": 400}
-                        ]
-                        tree.build_table_data(coldata=default_coldata, rowdata=rowdata)
-                    else:
-                        log_message("No se pudo encontrar método para actualizar Tableview", level='warning')
-                elif is_listbox:
-                    # Para Listbox
-                    for row in rowdata:
-                        tree.insert(tk.END, f"{row[0]} - {row[1]} - {row[2]} - {row[3]}")
-                else:
-                    # Para Treeview estándar
-                    for row in rowdata:
-                        tree.insert("", "end", values=row)
-                
-                log_message(f"Se mostraron {len(rowdata)} entradas en el historial")
-            except Exception as e:
-                log_message(f"Error al actualizar datos de historial: {e}", level='error')
-                
-                # Intento alternativo si falla el método primario
-                try:
-                    if is_tableview:
-                        log_message("Intentando método alternativo para Tableview", level='debug')
-                        # Crear un nuevo Tableview como reemplazo
-                        parent = tree.master
-                        tree.pack_forget()
-                        
-                        new_tree = ttk.Treeview(parent, columns=("fecha", "nick", "sala", "stats"), show="headings", height=10)
-                        new_tree.heading("fecha", text="Fecha")
-                        new_tree.heading("nick", text="Nick")
-                        new_tree.heading("sala", text="Sala")
-                        new_tree.heading("stats", text="Stats")
-                        
-                        new_tree.column("fecha", width=150)
-                        new_tree.column("nick", width=150)
-                        new_tree.column("sala", width=50)
-                        new_tree.column("stats", width=400)
-                        
-                        # Añadir datos
-                        for row in rowdata:
-                            new_tree.insert("", "end", values=row)
-                        
-                        # Empaquetar el nuevo widget
-                        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=new_tree.yview)
-                        new_tree.configure(yscrollcommand=scrollbar.set)
-                        scrollbar.pack(side="right", fill="y")
-                        new_tree.pack(fill="both", expand=True, padx=10, pady=5)
-                        
-                        # Reemplazar referencia
-                        tree._is_tableview = False
-                        tree = new_tree
-                    elif not is_listbox:
-                        # Para Treeview estándar como fallback si no es Tableview ni Listbox
-                        for row in rowdata:
-                            tree.insert("", "end", values=row)
-                except Exception as e2:
-                    log_message(f"Error en método alternativo: {e2}", level='error')
-        elif search_text:
-            # Mostrar mensaje de "no se encontraron resultados"
-            try:
-                if is_tableview:
-                    if hasattr(tree, 'saved_coldata'):
-                        tree.build_table_data(coldata=tree.saved_coldata, rowdata=[("", "No se encontraron resultados", "", "")])
-                    else:
-                        default_coldata = [
-                            {"text": "Fecha", "stretch": False, "width": 150},
-                            {"text": "Nick", "stretch": True, "width": 150},
-                            {"text": "Sala", "stretch": False, "width": 50},
-                            {"text": "Stats", "stretch": True, "width": 400}
-                        ]
-                        tree.build_table_data(coldata=default_coldata, rowdata=[("", "No se encontraron resultados", "", "")])
-                elif is_listbox:
-                    tree.insert(tk.END, "No se encontraron resultados")
-                else:
-                    tree.insert("", "end", values=("", "No se encontraron resultados", "", ""))
-            except Exception as e:
-                log_message(f"Error al mostrar mensaje de no resultados: {e}", level='debug')
+        log_message(f"Historial actualizado: {total} entradas, mostrando desde la {tree._offset + 1}", level='debug')
     except Exception as e:
         log_message(f"Error general al actualizar historial: {e}", level='error')
         import traceback
-        log_message(traceback.format_exc(), level='error')
\ No newline at end of file
+        log_message(traceback.format_exc(), level='error')
@@ -53,7 +53,7 @@ except ImportError:
 
 from src.utils.logger import log_message
 from src.utils.windows import get_window_under_cursor, find_poker_tables
-from src.core.poker_analyzer import analyze_table, copy_last_stats_to_clipboard, copy_last_analysis_to_clipboard, copy_last_results_to_clipboard
+from src.core.poker_analyzer import analyze_table, analyze_full_table, copy_last_stats_to_clipboard, copy_last_analysis_to_clipboard, copy_last_results_to_clipboard
 
 def is_tableview_available():
     """Comprueba si Tableview está disponible sin errores"""
@@ -967,6 +967,35 @@ def create_main_tab(parent, config):
             ttk.Button(button_frame, text="Analizar Mesa Bajo Cursor", 
                     command=analyze_table_under_cursor).pack(side="left", padx=5, pady=5)
     
+    # Botón para leer todos los asientos de la mesa bajo el cursor
+    def read_full_table_under_cursor():
+        hwnd, _ = get_window_under_cursor()
+        if hwnd:
+            threading.Thread(target=analyze_full_table, args=(hwnd, config)).start()
+        else:
+            if USING_COMPAT:
+                from src.utils.ttkbootstrap_compat import show_message
+                show_message("Sin ventana", "No se encontró una mesa bajo el cursor", "warning")
+            else:
+                from tkinter import messagebox
+                messagebox.showwarning("Sin ventana", "No se encontró una mesa bajo el cursor")
+    
+    if USING_COMPAT:
+        from src.utils.ttkbootstrap_compat import create_themed_button
+        full_table_btn = create_themed_button(button_frame, "👥 Leer Mesa Completa", read_full_table_under_cursor, "info")
+        full_table_btn.pack(side="left", padx=5, pady=5)
+    else:
+        try:
+            if USING_TTKBOOTSTRAP:
+                ttk.Button(button_frame, text="👥 Leer Mesa Completa", bootstyle="info", 
+                        command=read_full_table_under_cursor).pack(side="left", padx=5, pady=5)
+            else:
+                ttk.Button(button_frame, text="Leer Mesa Completa", 
+                        command=read_full_table_under_cursor).pack(side="left", padx=5, pady=5)
+        except Exception:
+            ttk.Button(button_frame, text="Leer Mesa Completa", 
+                    command=read_full_table_under_cursor).pack(side="left", padx=5, pady=5)
+    
     # Botón para limpiar caché
     def clear_cache():
         from src.core.poker_analyzer import clear_nick_cache
@@ -1002,7 +1031,110 @@ def create_main_tab(parent, config):
             ttk.Button(button_frame, text="Limpiar Caché", 
                     command=clear_cache).pack(side="right", padx=5, pady=5)
     
+    # Panel de rendimiento en vivo
+    create_performance_card(content_frame, is_dark)
+    
     # Inicializar la lista de mesas
     refresh_tables()
     
-    return tab
\ No newline at end of file
+    return tab
+
+# Indicadores del panel de rendimiento: clave -> texto
+PERFORMANCE_ITEMS = [
+    ("analisis_min", "Análisis/min"),
+    ("barridos", "Barridos sin cambios"),
+    ("errores_api", "Errores API"),
+    ("cache_nicks", "Caché nicks"),
+    ("cache_stats", "Caché stats"),
+    ("cache_analisis", "Caché análisis"),
+    ("ocr_confianza", "Confianza OCR"),
+    ("gpt_latencia", "GPT p50/p95"),
+    ("total_latencia", "Análisis p50/p95")
+]
+
+def get_performance_values():
+    """Calcula los valores que muestra el panel de rendimiento"""
+    from src.utils import metrics
+    from src.utils.tracing import get_stage_percentiles
+    from src.core.nick_cache import get_nick_cache_stats
+    from src.core.stats_cache import get_stats_cache_stats
+    from src.core.analysis_cache import get_analysis_cache_stats
+    from src.core.poker_analyzer import get_sweep_stats
+    
+    percentiles = get_stage_percentiles()
+    
+    def latency(stage):
+        values = percentiles.get(stage)
+        if not values:
+            return "—"
+        return f"{values['p50_ms'] / 1000:.2f}s / {values['p95_ms'] / 1000:.2f}s"
+    
+    api_total = metrics.get_counter("pokerbot_api_peticiones_total")
+    api_errors = metrics.get_counter("pokerbot_api_peticiones_total", resultado="error")
+    confidence = metrics.get_histogram("pokerbot_ocr_confianza")
+    sweeps = get_sweep_stats()
+    
+    return {
+        "analisis_min": f"{metrics.get_rate_per_minute('pokerbot_analisis_total', resultado='ok'):.1f}",
+        "barridos": f"{sweeps['barridos_sin_cambios']} de {sweeps['barridos']} ({sweeps['mesas_omitidas']} mesas)",
+        "errores_api": f"{api_errors / api_total:.0%} de {api_total}" if api_total else "—",
+        "cache_nicks": f"{get_nick_cache_stats()['tasa_acierto']:.0%}",
+        "cache_stats": f"{get_stats_cache_stats()['tasa_acierto']:.0%}",
+        "cache_analisis": f"{get_analysis_cache_stats()['tasa_acierto']:.0%}",
+        "ocr_confianza": f"{confidence['sum'] / confidence['count']:.2f} ({confidence['count']} lecturas)" if confidence["count"] else "—",
+        "gpt_latencia": latency("gpt"),
+        "total_latencia": latency("total_analisis")
+    }
+
+def create_performance_card(content_frame, is_dark, interval_ms=2000):
+    """Crea la tarjeta de rendimiento, que se refresca sola mientras exista"""
+    try:
+        if USING_TTKBOOTSTRAP:
+            perf_card = ttk.Frame(content_frame, bootstyle="light")
+        else:
+            perf_card = ttk.Frame(content_frame)
+            if is_dark:
+                perf_card.configure(style="TFrame")
+    except Exception:
+        perf_card = ttk.Frame(content_frame)
+    perf_card.pack(fill="x", padx=20, pady=10)
+    
+    try:
+        if USING_TTKBOOTSTRAP:
+            ttk.Label(perf_card, text="Rendimiento", font=("", 14, "bold"), 
+                    bootstyle="primary").pack(pady=(10,5), padx=10, fill="x")
+        else:
+            label = ttk.Label(perf_card, text="Rendimiento", font=("", 14, "bold"))
+            if is_dark:
+                try:
+                    label.configure(foreground="#007acc")
+                except:
+                    pass
+            label.pack(pady=(10,5), padx=10, fill="x")
+    except Exception:
+        ttk.Label(perf_card, text="Rendimiento", font=("", 14, "bold")).pack(pady=(10,5), padx=10, fill="x")
+    
+    perf_frame = ttk.Frame(perf_card, padding=10)
+    perf_frame.pack(fill="x", padx=10, pady=5)
+    perf_frame.name = "performance_frame"
+    
+    # Dos columnas de indicadores: etiqueta y valor
+    value_vars = {}
+    for index, (key, text) in enumerate(PERFORMANCE_ITEMS):
+        row, column = divmod(index, 2)
+        ttk.Label(perf_frame, text=f"{text}:").grid(row=row, column=column * 2, padx=5, pady=2, sticky="e")
+        value_vars[key] = tk.StringVar(value="—")
+        ttk.Label(perf_frame, textvariable=value_vars[key], width=22).grid(row=row, column=column * 2 + 1, padx=5, pady=2, sticky="w")
+    
+    def refresh():
+        if not perf_frame.winfo_exists():
+            return
+        try:
+            for key, value in get_performance_values().items():
+                value_vars[key].set(value)
+        except Exception as e:
+            log_message(f"Error al actualizar panel de rendimiento: {e}", level='debug')
+        perf_frame.after(interval_ms, refresh)
+    
+    refresh()
+    return perf_card
\ No newline at end of file
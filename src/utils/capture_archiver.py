@@ -0,0 +1,250 @@
+import itertools
+import json
+import os
+import queue
+import random
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.logger import log_message
+
+archiver_settings = {
+    "enabled": True,
+    "directory": "capturas/archivo",  # fuera de captura_replay_dir: el replay no lee lo archivado
+    "sample_rate": 0.1,  # fracción de capturas que se guardan (1 = todas)
+    "max_bytes": 100 * 1024 * 1024,
+    "max_files": 2000,
+    "store_ocr": True,  # JSON junto a cada imagen con el resultado del OCR
+    "queue_size": 64
+}
+
+# Sólo se gestionan (y expulsan) los archivos con el nombre que genera el archivador;
+# el corpus de capturas versionado u otros PNG del directorio no se tocan nunca
+ARCHIVE_PREFIX = "capture_"
+ARCHIVE_NAME = re.compile(r"^capture_\d{8}_\d{6}_\d{6}_\d{4}$")
+
+archive_queue = None
+archive_thread = None
+archive_lock = threading.Lock()
+name_sequence = itertools.count()
+
+# Archivos del archivo en disco, del más antiguo al más reciente: [(ruta png, bytes png + json)]
+archived_files = []
+archived_bytes = 0
+archive_scanned = False
+
+archiver_stats = {"saved": 0, "skipped": 0, "dropped": 0, "evicted": 0, "errors": 0}
+
+def load_archiver_settings(config):
+    """Actualiza muestreo, cuota y directorio del archivo de capturas desde la configuración"""
+    global archive_scanned
+
+    archiver_settings["enabled"] = bool(config.get("capturas_guardar", True))
+    archiver_settings["sample_rate"] = min(1.0, max(0.0, float(config.get("capturas_muestreo", 0.1))))
+    archiver_settings["max_bytes"] = max(1, int(float(config.get("capturas_max_mb", 100)) * 1024 * 1024))
+    archiver_settings["max_files"] = max(1, int(config.get("capturas_max_archivos", 2000)))
+    archiver_settings["store_ocr"] = bool(config.get("capturas_guardar_ocr", True))
+
+    directory = config.get("capturas_dir", "capturas/archivo")
+    with archive_lock:
+        if directory != archiver_settings["directory"]:
+            archiver_settings["directory"] = directory
+            archive_scanned = False
+
+def _get_queue():
+    """Devuelve la cola del escritor en segundo plano, arrancando el hilo la primera vez"""
+    global archive_queue, archive_thread
+
+    with archive_lock:
+        if archive_thread is None or not archive_thread.is_alive():
+            archive_queue = queue.Queue(maxsize=archiver_settings["queue_size"])
+            archive_thread = threading.Thread(target=_archive_worker, args=(archive_queue,),
+                                              name="capture-archiver", daemon=True)
+            archive_thread.start()
+        return archive_queue
+
+def archive_capture(img, **info):
+    """Programa el guardado de una captura según el muestreo; devuelve su nombre o None si no se guarda"""
+    if not archiver_settings["enabled"] or random.random() >= archiver_settings["sample_rate"]:
+        with archive_lock:
+            archiver_stats["skipped"] += 1
+        return None
+
+    # Nombre único: fecha con microsegundos y un contador por si coinciden
+    name = f"{ARCHIVE_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{next(name_sequence) % 10000:04d}"
+    info = dict(info, timestamp=datetime.now().isoformat(timespec="milliseconds"))
+
+    # La imagen lleva su nombre para poder asociarle después el resultado del OCR
+    img.info["capture_name"] = name
+    try:
+        _get_queue().put_nowait(("image", name, img, info))
+    except queue.Full:
+        # Nunca bloquear la lectura del nick por el disco
+        img.info.pop("capture_name", None)
+        with archive_lock:
+            archiver_stats["dropped"] += 1
+        return None
+    return name
+
+def annotate_capture(img, nick, detected_texts=None, engine=None):
+    """Guarda junto a la captura archivada el nick leído y los textos detectados"""
+    name = getattr(img, "info", {}).get("capture_name")
+    if not name or not archiver_settings["store_ocr"]:
+        return False
+
+    result = {
+        "nick": nick,
+        "motor": engine,
+        "textos": [{"texto": text, "confianza": round(float(confidence), 4)} for text, confidence in (detected_texts or [])]
+    }
+    try:
+        _get_queue().put_nowait(("ocr", name, None, result))
+        return True
+    except queue.Full:
+        with archive_lock:
+            archiver_stats["dropped"] += 1
+        return False
+
+def _scan_archive(directory):
+    """Lee del disco los archivos ya archivados, del más antiguo al más reciente (llamar con archive_lock)"""
+    global archived_files, archived_bytes, archive_scanned
+
+    entries = []
+    if directory.exists():
+        for path in directory.glob(f"{ARCHIVE_PREFIX}*.png"):
+            if not ARCHIVE_NAME.match(path.stem):
+                continue
+            try:
+                size = path.stat().st_size
+                sidecar = path.with_suffix(".json")
+                if sidecar.exists():
+                    size += sidecar.stat().st_size
+                entries.append((path.stat().st_mtime, path, size))
+            except OSError:
+                continue
+    entries.sort()
+    archived_files = [(path, size) for _, path, size in entries]
+    archived_bytes = sum(size for _, size in archived_files)
+    archive_scanned = True
+
+def _evict_oldest():
+    """Borra las capturas más antiguas hasta respetar la cuota (llamar con archive_lock)"""
+    global archived_bytes
+
+    while archived_files and (archived_bytes > archiver_settings["max_bytes"] or
+                              len(archived_files) > archiver_settings["max_files"]):
+        path, size = archived_files.pop(0)
+        archived_bytes -= size
+        for victim in (path, path.with_suffix(".json")):
+            try:
+                victim.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log_message(f"No se pudo borrar captura antigua {victim}: {e}", level='warning')
+        archiver_stats["evicted"] += 1
+
+def _write_image(name, img, info):
+    """Guarda la imagen (y sus metadatos) y aplica la cuota"""
+    global archived_bytes
+
+    directory = Path(archiver_settings["directory"])
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.png"
+
+    # Escribir a un temporal y renombrar: el replay nunca ve un PNG a medias
+    tmp_path = directory / f"{name}.tmp"
+    img.save(tmp_path, format="PNG")
+    os.replace(tmp_path, path)
+    size = path.stat().st_size
+
+    if archiver_settings["store_ocr"]:
+        size += _write_sidecar(path, {"archivo": path.name, **info})
+
+    with archive_lock:
+        if not archive_scanned:
+            _scan_archive(directory)
+        else:
+            archived_files.append((path, size))
+            archived_bytes += size
+        archiver_stats["saved"] += 1
+        _evict_oldest()
+
+def _write_sidecar(path, data):
+    """Escribe o completa el JSON de una captura; devuelve los bytes añadidos"""
+    sidecar = path.with_suffix(".json")
+    previous_size = 0
+    if sidecar.exists():
+        previous_size = sidecar.stat().st_size
+        with open(sidecar, "r", encoding="utf-8") as f:
+            data = {**json.load(f), **data}
+    with open(sidecar, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return sidecar.stat().st_size - previous_size
+
+def _write_ocr(name, result):
+    """Añade el resultado del OCR al JSON de una captura ya guardada"""
+    global archived_bytes
+
+    path = Path(archiver_settings["directory"]) / f"{name}.png"
+    if not path.exists():
+        return
+    added = _write_sidecar(path, result)
+    with archive_lock:
+        for index, (archived_path, size) in enumerate(archived_files):
+            if archived_path == path:
+                archived_files[index] = (archived_path, size + added)
+                archived_bytes += added
+                break
+
+def _archive_worker(jobs):
+    """Hilo que escribe en disco las capturas en orden de llegada"""
+    while True:
+        job = jobs.get()
+        try:
+            if job is None:
+                return
+            kind, name, img, data = job
+            if kind == "image":
+                _write_image(name, img, data)
+            else:
+                _write_ocr(name, data)
+        except Exception as e:
+            with archive_lock:
+                archiver_stats["errors"] += 1
+            log_message(f"Error al archivar captura: {e}", level='warning')
+        finally:
+            jobs.task_done()
+
+def flush_archiver():
+    """Espera a que se escriban las capturas pendientes"""
+    with archive_lock:
+        jobs = archive_queue if archive_thread is not None and archive_thread.is_alive() else None
+    if jobs is not None:
+        jobs.join()
+
+def shutdown_archiver():
+    """Escribe lo pendiente y detiene el hilo del archivo de capturas"""
+    global archive_thread
+
+    with archive_lock:
+        thread, jobs = archive_thread, archive_queue
+        archive_thread = None
+    if thread is not None and thread.is_alive():
+        jobs.put(None)
+        thread.join(timeout=5)
+
+def get_archiver_stats():
+    """Devuelve capturas guardadas, descartadas por muestreo o cola llena, expulsadas y el uso de disco"""
+    with archive_lock:
+        return {
+            "guardadas": archiver_stats["saved"],
+            "omitidas": archiver_stats["skipped"],
+            "descartadas": archiver_stats["dropped"],
+            "expulsadas": archiver_stats["evicted"],
+            "errores": archiver_stats["errors"],
+            "archivos": len(archived_files),
+            "bytes": archived_bytes
+        }
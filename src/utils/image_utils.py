@@ -1,22 +1,107 @@
-from PIL import Image, ImageFilter, ImageEnhance
+import time
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageEnhance
+
+# Matrices DCT-II ya calculadas por tamaño (pHash)
+_dct_matrices = {}
+
+# Conteo de bits: int.bit_count existe desde Python 3.10
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:
+    def _popcount(value):
+        return bin(value).count("1")
+
+def _to_gray_array(img, size):
+    """Reduce una imagen (PIL o array NumPy) a escala de grises con tamaño (ancho, alto)"""
+    if isinstance(img, np.ndarray):
+        img = Image.fromarray(img)
+    # Convertir primero a gris: el redimensionado trabaja sobre un solo canal
+    return np.asarray(img.convert("L").resize(size, Image.BOX), dtype=np.float32)
+
+def _pack_bits(bits):
+    """Empaqueta una matriz booleana en un entero"""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+def _dct_matrix(n):
+    """Matriz DCT-II ortonormal de tamaño n x n"""
+    matrix = _dct_matrices.get(n)
+    if matrix is None:
+        k = np.arange(n).reshape(-1, 1)
+        i = np.arange(n).reshape(1, -1)
+        matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+        matrix[0, :] = np.sqrt(1.0 / n)
+        matrix = matrix.astype(np.float32)
+        _dct_matrices[n] = matrix
+    return matrix
+
+def average_hash(img, hash_size=32):
+    """aHash: un bit por píxel de una miniatura hash_size x hash_size/2, 1 si supera la media"""
+    pixels = _to_gray_array(img, (hash_size, hash_size // 2))
+    return _pack_bits(pixels > pixels.mean())
+
+def difference_hash(img, hash_size=32):
+    """dHash: compara cada píxel con su vecino derecho (robusto a cambios de brillo)"""
+    pixels = _to_gray_array(img, (hash_size + 1, hash_size // 2))
+    return _pack_bits(pixels[:, 1:] > pixels[:, :-1])
+
+def perceptual_hash(img, hash_size=16, highfreq_factor=4):
+    """pHash: signo de las frecuencias bajas de la DCT respecto a su mediana"""
+    size = hash_size * highfreq_factor
+    pixels = _to_gray_array(img, (size, size))
+    dct_matrix = _dct_matrix(size)
+    low_freq = (dct_matrix @ pixels @ dct_matrix.T)[:hash_size, :hash_size]
+    return _pack_bits(low_freq > np.median(low_freq))
 
 def generate_image_hash(img, hash_size=32):
-    """Genera un hash perceptual de una imagen para comparación"""
-    # Reducir tamaño para comparación
+    """Genera un hash perceptual (aHash empaquetado en un entero) para comparación"""
+    return average_hash(img, hash_size)
+
+def hash_to_bytes(hash_value, bits=512):
+    """Convierte un hash entero en bytes big-endian de bits/8 bytes"""
+    return hash_value.to_bytes((bits + 7) // 8, "big")
+
+def hamming_distance(hash_a, hash_b):
+    """Número de bits distintos entre dos hashes (enteros o bytes)"""
+    if isinstance(hash_a, (bytes, bytearray)):
+        hash_a = int.from_bytes(hash_a, "big")
+    if isinstance(hash_b, (bytes, bytearray)):
+        hash_b = int.from_bytes(hash_b, "big")
+    return _popcount(hash_a ^ hash_b)
+
+def _legacy_image_hash(img, hash_size=32):
+    """Implementación anterior (píxeles en listas de Python y cadena de '0'/'1'), sólo para comparar"""
     img = img.resize((hash_size, hash_size//2), Image.LANCZOS)
-    
-    # Convertir a escala de grises
     img = img.convert("L")
-    
-    # Obtener datos de píxeles
     pixels = list(img.getdata())
-    
-    # Calcular valor promedio
     avg = sum(pixels) / len(pixels)
-    
-    # Generar hash basado en píxeles sobre/bajo promedio
     return "".join('1' if pixel > avg else '0' for pixel in pixels)
 
+def benchmark_image_hashes(iterations=1000, size=(95, 22)):
+    """Micro-benchmark de los hashes sobre un recorte del tamaño del nick (µs por llamada)"""
+    rng = np.random.default_rng(0)
+    img = Image.fromarray(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8))
+    other = average_hash(Image.fromarray(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)))
+    legacy_other = _legacy_image_hash(img)
+
+    cases = {
+        "legacy_string": lambda: _legacy_image_hash(img),
+        "average_hash": lambda: average_hash(img),
+        "difference_hash": lambda: difference_hash(img),
+        "perceptual_hash": lambda: perceptual_hash(img),
+        "legacy_hamming": lambda: sum(a != b for a, b in zip(legacy_other, legacy_other[::-1])),
+        "hamming_distance": lambda: hamming_distance(other, other >> 1)
+    }
+
+    results = {}
+    for name, func in cases.items():
+        func()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        results[name] = (time.perf_counter() - start) * 1e6 / iterations
+    return results
+
 def enhance_image_for_ocr(img):
     """Mejora una imagen para mejor reconocimiento OCR"""
     # Aumentar nitidez
@@ -72,4 +157,8 @@ def create_test_image(text="Test OCR 测试 テスト"):
         # Fallback si hay problemas con fuentes
         d.text((10, 10), text, fill=(255, 255, 255))
     
-    return img
\ No newline at end of file
+    return img
+
+if __name__ == "__main__":
+    for name, micros in benchmark_image_hashes().items():
+        print(f"{name:>18}: {micros:8.1f} µs")
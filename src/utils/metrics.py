@@ -0,0 +1,225 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.logger import log_message
+
+# Límites de los histogramas (Prometheus acumula por "menor o igual que")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+# Descripción y tipo de cada métrica: nombre -> (tipo, ayuda, límites del histograma)
+METRICS = {
+    "pokerbot_analisis_total": ("counter", "Análisis de jugadores terminados por resultado", None),
+    "pokerbot_api_peticiones_total": ("counter", "Peticiones a la API de stats por ruta y resultado", None),
+    "pokerbot_barridos_total": ("counter", "Barridos automáticos por resultado (sin_cambios = ninguna mesa cambió)", None),
+    "pokerbot_mesas_omitidas_total": ("counter", "Mesas omitidas en el barrido porque el nick no cambió", None),
+    "pokerbot_ocr_lecturas_total": ("counter", "Lecturas de nick por motor OCR y resultado", None),
+    "pokerbot_ocr_confianza": ("histogram", "Confianza del texto elegido como nick", CONFIDENCE_BUCKETS),
+    "pokerbot_etapa_segundos": ("histogram", "Duración de cada etapa del análisis", LATENCY_BUCKETS)
+}
+
+metrics_settings = {
+    "port": 9464,  # 0 = sin endpoint HTTP
+    "rate_window": 60  # segundos usados para calcular los eventos por minuto
+}
+
+metrics_lock = threading.Lock()
+
+# nombre -> {etiquetas (tupla ordenada) -> valor}
+counters = {}
+# nombre -> {etiquetas -> {"counts": [...], "sum": float, "count": int}}
+histograms = {}
+# nombre -> instantes de los incrementos recientes (para tasas por minuto)
+counter_events = {}
+
+# Funciones que aportan valores calculados al exportar (p. ej. estado de las cachés)
+collectors = []
+
+metrics_server = None
+
+def load_metrics_settings(config):
+    """Actualiza el puerto del endpoint de métricas desde la configuración"""
+    metrics_settings["port"] = max(0, int(config.get("metricas_puerto", 9464)))
+
+def _label_key(labels):
+    """Convierte las etiquetas en una clave ordenada y hashable"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def inc_counter(name, value=1, **labels):
+    """Incrementa un contador con las etiquetas indicadas"""
+    key = _label_key(labels)
+    now = time.monotonic()
+    with metrics_lock:
+        series = counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+        events = counter_events.get(name)
+        if events is None:
+            events = counter_events[name] = deque(maxlen=10000)
+        events.append((now, key, value))
+
+def observe(name, value, **labels):
+    """Registra una observación en un histograma"""
+    buckets = METRICS.get(name, (None, None, LATENCY_BUCKETS))[2] or LATENCY_BUCKETS
+    key = _label_key(labels)
+    with metrics_lock:
+        series = histograms.setdefault(name, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = {"counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+        index = bisect_left(buckets, value)
+        if index < len(buckets):
+            histogram["counts"][index] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+def register_collector(collector):
+    """Añade una función que devuelve [(nombre, tipo, ayuda, etiquetas, valor)] al exportar"""
+    if collector not in collectors:
+        collectors.append(collector)
+
+def get_rate_per_minute(name, **labels):
+    """Incrementos por minuto de un contador en la ventana reciente (filtrados por etiquetas)"""
+    window = metrics_settings["rate_window"]
+    cutoff = time.monotonic() - window
+    wanted = set(_label_key(labels))
+    with metrics_lock:
+        events = counter_events.get(name, ())
+        total = sum(value for moment, key, value in events
+                    if moment >= cutoff and wanted.issubset(key))
+    return total * 60.0 / window
+
+def get_counter(name, **labels):
+    """Suma de un contador sobre las series que contienen las etiquetas indicadas"""
+    wanted = set(_label_key(labels))
+    with metrics_lock:
+        return sum(value for key, value in counters.get(name, {}).items() if wanted.issubset(key))
+
+def get_histogram(name, **labels):
+    """Combina las series de un histograma que contienen las etiquetas indicadas"""
+    buckets = METRICS.get(name, (None, None, LATENCY_BUCKETS))[2] or LATENCY_BUCKETS
+    wanted = set(_label_key(labels))
+    combined = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+    with metrics_lock:
+        for key, histogram in histograms.get(name, {}).items():
+            if not wanted.issubset(key):
+                continue
+            combined["counts"] = [a + b for a, b in zip(combined["counts"], histogram["counts"])]
+            combined["sum"] += histogram["sum"]
+            combined["count"] += histogram["count"]
+    return combined
+
+def reset_metrics():
+    """Pone a cero contadores e histogramas"""
+    with metrics_lock:
+        counters.clear()
+        histograms.clear()
+        counter_events.clear()
+
+def _format_labels(key, extra=None):
+    """Etiquetas en formato de texto de Prometheus"""
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+def render_metrics():
+    """Genera todas las métricas en el formato de texto de Prometheus"""
+    lines = []
+    with metrics_lock:
+        counter_snapshot = {name: dict(series) for name, series in counters.items()}
+        histogram_snapshot = {
+            name: {key: {"counts": list(h["counts"]), "sum": h["sum"], "count": h["count"]} for key, h in series.items()}
+            for name, series in histograms.items()
+        }
+
+    for name, series in counter_snapshot.items():
+        kind, help_text, _ = METRICS.get(name, ("counter", name, None))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key, value in series.items():
+            lines.append(f"{name}{_format_labels(key)} {value}")
+
+    for name, series in histogram_snapshot.items():
+        _, help_text, buckets = METRICS.get(name, ("histogram", name, LATENCY_BUCKETS))
+        buckets = buckets or LATENCY_BUCKETS
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, histogram in series.items():
+            cumulative = 0
+            for limit, count in zip(buckets, histogram["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(key, ('le', repr(float(limit))))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(key)} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(key)} {histogram['count']}")
+
+    # Valores calculados al momento (estado de cachés, etc.)
+    declared = set()
+    for collector in list(collectors):
+        try:
+            for name, kind, help_text, labels, value in collector():
+                if name not in declared:
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    declared.add(name)
+                lines.append(f"{name}{_format_labels(_label_key(labels))} {value}")
+        except Exception as e:
+            log_message(f"Error en colector de métricas: {e}", level='warning')
+
+    return "\n".join(lines) + "\n"
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Sirve /metrics en texto plano para Prometheus o un navegador"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sin una línea por petición en la consola
+        pass
+
+def start_metrics_server(config=None):
+    """Inicia el endpoint de métricas en 127.0.0.1 si hay un puerto configurado"""
+    global metrics_server
+
+    if config is not None:
+        load_metrics_settings(config)
+    port = metrics_settings["port"]
+    if not port or metrics_server is not None:
+        return metrics_server
+
+    try:
+        # Sólo en local: el endpoint no se expone a la red
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsRequestHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        metrics_server = server
+        log_message(f"Métricas disponibles en http://127.0.0.1:{port}/metrics")
+    except OSError as e:
+        log_message(f"No se pudo iniciar el endpoint de métricas en el puerto {port}: {e}", level='warning')
+    return metrics_server
+
+def stop_metrics_server():
+    """Detiene el endpoint de métricas"""
+    global metrics_server
+
+    server = metrics_server
+    metrics_server = None
+    if server is not None:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,216 @@
+import json
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.logger import log_message
+from src.utils import metrics
+
+TRACES_DIR = Path("logs")
+
+trace_settings = {
+    "enabled": True,
+    "window": 500,  # muestras por etapa para los percentiles y trazas recientes guardadas
+    "write_file": False  # añadir cada traza terminada a logs/trazas_<fecha>.jsonl
+}
+
+# Traza activa en cada hilo; los hilos de segundo plano la reciben con run_in_trace
+thread_state = threading.local()
+traces_lock = threading.Lock()
+file_lock = threading.Lock()
+
+# Duraciones recientes por etapa (ms) y últimas trazas terminadas
+stage_samples = {}
+recent_traces = deque(maxlen=500)
+
+def load_tracing_settings(config):
+    """Actualiza la instrumentación de latencias desde la configuración"""
+    global recent_traces
+
+    trace_settings["enabled"] = bool(config.get("trazas_activas", True))
+    trace_settings["window"] = max(10, int(config.get("trazas_muestras", 500)))
+    trace_settings["write_file"] = bool(config.get("trazas_archivo", False))
+
+    with traces_lock:
+        recent_traces = deque(recent_traces, maxlen=trace_settings["window"])
+        for stage, samples in stage_samples.items():
+            stage_samples[stage] = deque(samples, maxlen=trace_settings["window"])
+
+def current_trace():
+    """Devuelve la traza activa en este hilo, o None"""
+    return getattr(thread_state, "trace", None)
+
+def start_trace(name, **attributes):
+    """Abre una traza con un identificador de correlación y la activa en este hilo"""
+    if not trace_settings["enabled"]:
+        return None
+
+    trace = {
+        "id": uuid.uuid4().hex[:12],
+        "name": name,
+        "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+        "attributes": attributes,
+        "spans": [],
+        "start": time.perf_counter(),
+        "open": 1,  # fases que aún no terminaron (la actual y las de segundo plano)
+        "status": "ok"
+    }
+    thread_state.trace = trace
+    return trace
+
+def set_trace_status(status):
+    """Marca el resultado de la traza activa (p. ej. "error") sin terminarla"""
+    trace = current_trace()
+    if trace is not None:
+        with traces_lock:
+            trace["status"] = status
+
+def retain_trace(trace):
+    """Marca una fase más de la traza que terminará en otro hilo"""
+    if trace is not None:
+        with traces_lock:
+            trace["open"] += 1
+
+def end_trace(trace, status=None):
+    """Termina una fase de la traza; al terminar la última se registra la traza completa"""
+    if trace is None:
+        return
+
+    if current_trace() is trace:
+        thread_state.trace = None
+
+    with traces_lock:
+        if status and status != "ok":
+            trace["status"] = status
+        trace["open"] -= 1
+        if trace["open"] > 0:
+            return
+        total_ms = (time.perf_counter() - trace["start"]) * 1000
+        trace["total_ms"] = round(total_ms, 3)
+        # Un total por tipo de traza: un análisis, un barrido y una mesa completa no son comparables
+        total_stage = f"total_{trace['name']}"
+        _add_sample(total_stage, total_ms)
+        recent_traces.append(trace)
+    metrics.observe("pokerbot_etapa_segundos", total_ms / 1000, etapa=total_stage)
+
+    summary = ", ".join(f"{span['stage']} {span['duration_ms']:.0f} ms" for span in trace["spans"])
+    log_message(f"Traza {trace['id']} ({trace['name']}, {trace['status']}): {summary}; total {trace['total_ms']:.0f} ms")
+
+    if trace_settings["write_file"]:
+        _write_traces([trace], _default_path())
+
+def run_in_trace(trace, func, *args, **kwargs):
+    """Ejecuta una función en otro hilo como parte de una traza retenida con retain_trace"""
+    thread_state.trace = trace
+    status = "ok"
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        end_trace(trace, status)
+
+def _add_sample(stage, duration_ms):
+    """Guarda una duración en la ventana de la etapa (llamar con traces_lock)"""
+    samples = stage_samples.get(stage)
+    if samples is None:
+        samples = stage_samples[stage] = deque(maxlen=trace_settings["window"])
+    samples.append(duration_ms)
+
+@contextmanager
+def span(stage, **attributes):
+    """Mide una etapa con reloj monótono y la añade a la traza activa y a los percentiles"""
+    if not trace_settings["enabled"]:
+        yield
+        return
+
+    trace = current_trace()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        metrics.observe("pokerbot_etapa_segundos", duration_ms / 1000, etapa=stage)
+        with traces_lock:
+            _add_sample(stage, duration_ms)
+            if trace is not None:
+                record = {
+                    "stage": stage,
+                    "start_ms": round((start - trace["start"]) * 1000, 3),
+                    "duration_ms": round(duration_ms, 3),
+                    "thread": threading.current_thread().name
+                }
+                if attributes:
+                    record["attributes"] = attributes
+                if error:
+                    record["error"] = error
+                trace["spans"].append(record)
+
+def _percentile(sorted_values, fraction):
+    """Percentil por el método del rango más cercano"""
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+def get_stage_percentiles():
+    """Devuelve muestras, media, p50, p95 y p99 (ms) de cada etapa en la ventana reciente"""
+    with traces_lock:
+        snapshot = {stage: sorted(samples) for stage, samples in stage_samples.items() if samples}
+
+    return {
+        stage: {
+            "muestras": len(values),
+            "media_ms": sum(values) / len(values),
+            "p50_ms": _percentile(values, 0.50),
+            "p95_ms": _percentile(values, 0.95),
+            "p99_ms": _percentile(values, 0.99)
+        }
+        for stage, values in snapshot.items()
+    }
+
+def reset_tracing():
+    """Descarta las muestras y trazas recientes"""
+    with traces_lock:
+        stage_samples.clear()
+        recent_traces.clear()
+
+def _default_path():
+    """Archivo JSON-lines de trazas del día"""
+    return TRACES_DIR / f"trazas_{datetime.now().strftime('%Y-%m-%d')}.jsonl"
+
+def _write_traces(traces, path):
+    """Añade trazas terminadas a un archivo JSON-lines"""
+    try:
+        path.parent.mkdir(exist_ok=True)
+        lines = []
+        for trace in traces:
+            record = {key: value for key, value in trace.items() if key not in ("start", "open")}
+            lines.append(json.dumps(record, ensure_ascii=False))
+        with file_lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        return True
+    except Exception as e:
+        log_message(f"Error al guardar trazas: {e}", level='error')
+        return False
+
+def dump_traces(path=None):
+    """Guarda las trazas recientes en un archivo JSON-lines para analizarlas fuera de la aplicación"""
+    path = Path(path) if path else _default_path()
+    with traces_lock:
+        traces = list(recent_traces)
+    if not traces:
+        return 0
+    if not _write_traces(traces, path):
+        return 0
+    log_message(f"{len(traces)} trazas guardadas en {path}")
+    return len(traces)
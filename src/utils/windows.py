@@ -1,10 +1,15 @@
 import re
-import win32gui
-import win32api
-import win32con
-import pyautogui
 import time
 
+try:
+    import win32gui
+    import win32api
+    import win32con
+except ImportError:  # Fuera de Windows (backend de captura replay) no hay ventanas que manejar
+    win32gui = None
+    win32api = None
+    win32con = None
+
 def is_poker_table(title):
     """Detecta si una ventana es una mesa de poker"""
     return bool(re.search(r'\d+ *\/ *\d+|\d+bb', title.lower()))
@@ -12,6 +17,8 @@ def is_poker_table(title):
 def find_poker_tables():
     """Busca todas las ventanas de mesas de poker activas"""
     tables = []
+    if win32gui is None:
+        return tables
     
     def callback(hwnd, _):
         title = win32gui.GetWindowText(hwnd)
@@ -28,6 +35,8 @@ def find_poker_tables():
 def get_window_under_cursor():
     """Obtiene el handle de la ventana bajo el cursor"""
     try:
+        import pyautogui
+
         # Obtener posición actual del cursor
         x, y = pyautogui.position()
         
@@ -0,0 +1,101 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core import api_client
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Servidor de stats mínimo: ruta individual, ruta bulk y contador de peticiones"""
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path))
+        nick = self.path.rsplit("/", 1)[-1]
+        self._reply(200, {"player_name": nick, "vpip": 25})
+
+    def do_POST(self):
+        self.server.requests.append(("POST", self.path))
+        length = int(self.headers.get("Content-Length", 0))
+        nicks = json.loads(self.rfile.read(length))["nicks"]
+        if self.server.bulk_mode == "missing":
+            self._reply(404, {"error": "ruta no encontrada"})
+        elif self.server.bulk_mode == "invalid":
+            # Stats que no son un objeto: convertirlas falla dentro del hilo que agrupa
+            self._reply(200, {"jugadores": {nick: 25 for nick in nicks}})
+        else:
+            self._reply(200, {"jugadores": {nick: {"player_name": nick, "vpip": 25} for nick in nicks}})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class CoalescingTest(unittest.TestCase):
+    """Las consultas concurrentes de una sala se agrupan en una sola llamada bulk"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.requests = []
+        self.server.bulk_mode = "ok"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.server_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        api_client.configure_http_session({"api_agrupar_ms": 50, "http_reintentos": 0, "http_timeout": 2})
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fetch_concurrently(self, nicks):
+        """Lanza una consulta por nick a la vez y devuelve {nick: resultado o excepción}"""
+        results = {}
+        barrier = threading.Barrier(len(nicks))
+
+        def fetch(nick):
+            barrier.wait()
+            try:
+                results[nick] = api_client.fetch_player_stats(nick, "XPK", "token", self.server_url)
+            except Exception as e:
+                results[nick] = e
+
+        threads = [threading.Thread(target=fetch, args=(nick,)) for nick in nicks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        return results
+
+    def test_concurrent_lookups_share_one_bulk_post(self):
+        nicks = [f"jugador{i}" for i in range(8)]
+        results = self.fetch_concurrently(nicks)
+
+        self.assertEqual(self.server.requests, [("POST", "/api/jugadores/XPK")])
+        for nick in nicks:
+            self.assertEqual(results[nick]["player_name"], nick)
+
+    def test_missing_bulk_route_falls_back_to_individual_calls(self):
+        self.server.bulk_mode = "missing"
+        nicks = ["ana", "beto", "carla"]
+        results = self.fetch_concurrently(nicks)
+
+        methods = [method for method, _ in self.server.requests]
+        self.assertEqual(methods.count("POST"), 1)
+        self.assertEqual(methods.count("GET"), len(nicks))
+        for nick in nicks:
+            self.assertEqual(results[nick]["player_name"], nick)
+
+    def test_invalid_bulk_payload_fails_every_waiting_lookup(self):
+        self.server.bulk_mode = "invalid"
+        results = self.fetch_concurrently(["ana", "beto"])
+
+        for result in results.values():
+            self.assertIsInstance(result, Exception)
+            self.assertNotIsInstance(result, TimeoutError)
+
+if __name__ == "__main__":
+    unittest.main()
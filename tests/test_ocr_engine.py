@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from src.core import ocr_engine
+
+class FakeEngine:
+    """Motor PaddleOCR mínimo que cuenta las llamadas al reconocedor"""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.recognizer_calls = []
+
+    def text_recognizer(self, images):
+        self.recognizer_calls.append(len(images))
+        return [self.texts[i] for i in range(len(images))], 0.01
+
+    def ocr(self, img, det=True, rec=True, cls=True):
+        raise AssertionError("la ruta rápida no debe pasar por engine.ocr")
+
+class RecognitionBatchTest(unittest.TestCase):
+    """Los recortes de nick de un lote se reconocen con una sola llamada al reconocedor"""
+
+    def setUp(self):
+        self.previous_settings = dict(ocr_engine.ocr_settings)
+        ocr_engine.ocr_settings.update(modo_rapido=True, umbral_confianza=0.85)
+
+    def tearDown(self):
+        ocr_engine.ocr_settings.clear()
+        ocr_engine.ocr_settings.update(self.previous_settings)
+
+    def test_one_recognizer_call_per_batch(self):
+        texts = [(f" nick{i} ", 0.95) for i in range(6)]
+        engine = FakeEngine(texts)
+        crops = [np.zeros((22, 95, 3), dtype=np.uint8) for _ in texts]
+
+        results = ocr_engine.run_ocr_task(engine, "batch", crops)
+
+        self.assertEqual(engine.recognizer_calls, [6])
+        self.assertEqual(results, [[(f"nick{i}", 0.95)] for i in range(6)])
+
+    def test_grayscale_crops_are_expanded_to_three_channels(self):
+        engine = FakeEngine([("nick", 0.9)])
+        recognized = ocr_engine.run_ocr_recognition(engine, [np.zeros((22, 95), dtype=np.uint8)])
+
+        self.assertEqual(recognized, [("nick", 0.9)])
+
+if __name__ == "__main__":
+    unittest.main()